@@ -1,13 +1,99 @@
+import json
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from configs.load_tools_config import LoadToolsConfig
-from src.voice.speech_io import transcribe_audio, synthesize_speech
+from src.voice.speech_io import transcribe_audio, synthesize_speech, prefetch_speech
 from streamlit_chat_widget import chat_input_widget
 
 # Load configuration
 tool_cfg = LoadToolsConfig()
-API_URL = "http://127.0.0.1:8000/chat/" # local development API URL
-#API_URL = "http://0.0.0.0:8000/chat/" # docker image api key
+API_URL = "http://127.0.0.1:8000/chat/stream" # local development API URL (SSE streaming endpoint)
+#API_URL = "http://0.0.0.0:8000/chat/stream" # docker image api key
+AUDIO_FORMAT = f"audio/{tool_cfg.playai_response_format}"
+AUDIO_POLL_SECONDS = 1.0  # how often a turn whose audio is still being generated checks for it
+
+@st.cache_resource
+def get_backend_session() -> requests.Session:
+    """Keep-alive session to the backend API, shared by every browser session of this server."""
+    retry = Retry(
+        total=tool_cfg.app_retries,
+        connect=tool_cfg.app_retries,
+        read=0,                                 # never resend a question the backend may be answering
+        status=tool_cfg.app_retries,
+        status_forcelist=(502, 503),
+        allowed_methods=frozenset({"POST"}),
+        backoff_factor=0.5,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_tts_executor() -> ThreadPoolExecutor:
+    """Background threads for speech synthesis; jobs outlive the script run that started them."""
+    return ThreadPoolExecutor(max_workers=tool_cfg.app_tts_workers, thread_name_prefix="tts-ui")
+
+def format_answer(answer: str):
+    """Splits the backend's "Agent: ...\nAnswer: ..." response into display markdown and text to speak."""
+    if answer.startswith("Agent:"):
+        agent_line, _, actual_answer = answer.partition("Answer:")
+        agent_name = agent_line.replace("Agent:", "").strip()
+        actual_answer = actual_answer.strip()
+        return f"👨‍⚕️ **Agent:** {agent_name}\n\n💬 **Answer:**\n{actual_answer}", actual_answer
+    return answer, answer
+
+def collect_audio():
+    """Moves finished background TTS jobs into the per-turn audio store, keeping only the newest turns."""
+    for turn_id, job in list(st.session_state.audio_jobs.items()):
+        if job.done():
+            del st.session_state.audio_jobs[turn_id]
+            try:
+                audio = job.result()
+            except Exception as e:
+                print(f"❌ TTS error: {e}")
+                audio = b""
+            st.session_state.audio[turn_id] = audio  # b"" marks a failed synthesis
+            while len(st.session_state.audio) > tool_cfg.app_audio_turns_kept:
+                st.session_state.audio.popitem(last=False)
+
+def render_audio(turn_id: str):
+    """Audio player for a turn, a pending note while it is generated, or nothing once it was dropped."""
+    if turn_id in st.session_state.audio:
+        if st.session_state.audio[turn_id]:
+            st.audio(st.session_state.audio[turn_id], format=AUDIO_FORMAT)
+        else:
+            st.caption("⚠️ Failed to generate audio.")
+    elif turn_id in st.session_state.audio_jobs:
+        render_pending_audio(turn_id)
+
+@st.fragment(run_every=AUDIO_POLL_SECONDS)
+def render_pending_audio(turn_id: str):
+    """Re-runs on its own until the turn's background TTS job is done, then shows its player."""
+    collect_audio()
+    if turn_id in st.session_state.audio_jobs:
+        st.caption("🔊 Generating audio...")
+    else:
+        render_audio(turn_id)
+
+def iter_sse_events(response):
+    """Yields (event, data) pairs from a Server-Sent Events response."""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+        elif not line and event:
+            yield event, json.loads("\n".join(data))
+            event, data = None, []
 
 # Set up the page
 st.set_page_config(page_title="Medical AI Chatbot 🧬", page_icon="👨‍⚕️")
@@ -21,12 +107,27 @@ selected_model = st.sidebar.selectbox("Select LLM Model", tool_cfg.llm_models)
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
-# Display previous chat history
-for chat in st.session_state.chat_history:
+# One backend conversation thread per browser session
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Synthesized audio per turn (bounded) and background TTS jobs still running
+if "audio" not in st.session_state:
+    st.session_state.audio = OrderedDict()
+if "audio_jobs" not in st.session_state:
+    st.session_state.audio_jobs = {}
+collect_audio()
+
+# Display previous chat history (only the latest turns are re-rendered on every run)
+hidden_turns = len(st.session_state.chat_history) - tool_cfg.app_history_turns_rendered
+if hidden_turns > 0:
+    st.caption(f"🗂️ {hidden_turns} earlier turns hidden")
+for chat in st.session_state.chat_history[max(hidden_turns, 0):]:
     with st.chat_message("user"):
         st.markdown(chat["user"])
     with st.chat_message("assistant"):
         st.markdown(chat["assistant"])
+        render_audio(chat["id"])
 
 st.markdown("---")  # use horizontal line instead of bottom() to keep layout stable
 try:
@@ -56,42 +157,52 @@ if user_input:
         with st.chat_message("user"):
             st.markdown(user_question)
 
-        with st.spinner("👨‍⚕️ Thinking..."):
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            placeholder.markdown("👨‍⚕️ Thinking...")
             try:
-                response = requests.post(API_URL, json={"question": user_question, "model_name": selected_model})
-                if response.status_code == 200:
-                    result = response.json()
-                    answer = result.get("response", "")
-
-                    # Format if response includes agent
-                    if answer.startswith("Agent:"):
-                        agent_line, _, actual_answer = answer.partition("Answer:")
-                        agent_name = agent_line.replace("Agent:", "").strip()
-                        actual_answer = actual_answer.strip()
-                        formatted_answer = f"👨‍⚕️ **Agent:** {agent_name}\n\n💬 **Answer:**\n{actual_answer}"
-                        text_to_speak = actual_answer
-                    else:
-                        formatted_answer = answer
-                        text_to_speak = answer
-
-                    with st.chat_message("assistant"):
-                        st.markdown(formatted_answer)
-                        with st.spinner("🔊 Generating audio..."):
-                            try:
-                                audio_response = synthesize_speech(text_to_speak)
-                                if audio_response:
-                                    st.audio(audio_response, format="audio/mp3")
-                                else:
-                                    st.warning("⚠️ Failed to generate audio.")
-                            except Exception as e:
-                                st.warning(f"⚠️ TTS error: {e}")
-
-                    # Save chat to session
-                    st.session_state.chat_history.append({
-                        "user": user_question,
-                        "assistant": formatted_answer
-                    })
-                else:
-                    st.error(f"❌ API Error {response.status_code}: {response.text}")
+                with get_backend_session().post(
+                    API_URL,
+                    json={"question": user_question, "model_name": selected_model, "session_id": st.session_state.session_id},
+                    stream=True,
+                    timeout=(tool_cfg.app_connect_timeout, tool_cfg.app_read_timeout),
+                ) as response:
+                    if response.status_code != 200:
+                        raise RuntimeError(f"API Error {response.status_code}: {response.text}")
+
+                    # Render worker tokens as they arrive (per agent: RAG and SQL stream side by side on
+                    # the RAG_SQL route) and start speaking finished sentences; the final event carries
+                    # the complete answer
+                    streamed, tts_started, answer = {}, set(), ""
+                    for event, data in iter_sse_events(response):
+                        if event == "route":
+                            streamed = {}
+                            placeholder.markdown(f"🧭 Routing to **{data['next']}** agent...")
+                        elif event == "token":
+                            agent = data["agent"]
+                            streamed[agent] = streamed.get(agent, "") + data["token"]
+                            prefetch_speech(streamed[agent], tts_started)
+                            placeholder.markdown("\n\n".join(
+                                f"👨‍⚕️ **Agent:** {agent}\n\n💬 **Answer:**\n{text}" for agent, text in streamed.items()
+                            ) + "▌")
+                        elif event == "final":
+                            answer = data["response"]
+
+                formatted_answer, text_to_speak = format_answer(answer)
+                placeholder.markdown(formatted_answer)
+
+                # Save chat to session before any audio work, so a rerun never loses the turn
+                turn_id = uuid.uuid4().hex
+                st.session_state.chat_history.append({
+                    "id": turn_id,
+                    "user": user_question,
+                    "assistant": formatted_answer
+                })
+
+                # Synthesize in the background (sentences prefetched while streaming are reused); the
+                # player appears once the job is done, without blocking this run
+                st.session_state.audio_jobs[turn_id] = get_tts_executor().submit(synthesize_speech, text_to_speak)
+                render_audio(turn_id)
             except Exception as e:
-                st.error(f"❌ Backend request failed: {e}")
\ No newline at end of file
+                placeholder.empty()
+                st.error(f"❌ Backend request failed: {e}")
@@ -16,30 +16,142 @@ class LoadToolsConfig:
         self.default_llm = cfg["primary_agent"]["llm"]
         self.default_llm_temperature = float(cfg["primary_agent"]["llm_temperature"])
 
-        # RAG (Pinecone-based)
+        # LLM HTTP connection pools
+        pool_cfg = cfg["llm_client_pool"]
+        self.llm_max_connections = {provider: int(n) for provider, n in pool_cfg["max_connections"].items()}
+        self.llm_max_keepalive_connections = int(pool_cfg["max_keepalive_connections"])
+        self.llm_keepalive_expiry = float(pool_cfg["keepalive_expiry"])
+        self.llm_request_timeout = float(pool_cfg["request_timeout"])
+
+        # RAG (Pinecone or local index)
         rag_cfg = cfg["guideipc_rag"]
+        self.rag_backend = rag_cfg["backend"]
         self.rag_embedding_model = rag_cfg["embedding_model"]
         self.rag_pinecone_index = rag_cfg["pinecone_index"]
         self.rag_k = int(rag_cfg["k"])
+        self.rag_pdf_dir = str(here(rag_cfg["pdf_dir"]))
+        self.rag_chunk_size = int(rag_cfg["chunk_size"])
+        self.rag_chunk_overlap = int(rag_cfg["chunk_overlap"])
+        self.rag_embed_batch_size = int(rag_cfg["embed_batch_size"])
+        self.rag_embed_workers = int(rag_cfg["embed_workers"])
+        self.rag_ingest_manifest_dir = str(here(rag_cfg["ingest_manifest_dir"]))
+        self.rag_local_index_dir = str(here(rag_cfg["local_index_dir"]))
+        self.rag_local_index_dtype = rag_cfg["local_index_dtype"]
+        self.rag_local_index_search = rag_cfg["local_index_search"]
+        self.rag_ivf_nlist = int(rag_cfg["ivf_nlist"])
+        self.rag_ivf_nprobe = int(rag_cfg["ivf_nprobe"])
+
+        # RAG / SQL tool output
+        self.tool_output_mode = cfg["tool_output"]["mode"]
+        self.tool_output_rag_chunk_chars = int(cfg["tool_output"]["rag_chunk_chars"])
 
         # SQL DB
         self.sql_db_path = str(here(cfg["health_sqlagent_configs"]["health_sqldb_dir"]))
         self.table_details_path = str(here(cfg["health_sqlagent_configs"]["table_descriptions_file"]))
+        self.sql_planning_mode = cfg["health_sqlagent_configs"]["planning_mode"]
+        self.sql_plan_max_schema_chars = int(cfg["health_sqlagent_configs"]["plan_max_schema_chars"])
+        self.sql_plan_local_tables = int(cfg["health_sqlagent_configs"]["plan_local_tables"])
+        self.schema_catalog_sample_rows = int(cfg["health_sqlagent_configs"]["schema_catalog_sample_rows"])
+        self.schema_catalog_max_distinct = int(cfg["health_sqlagent_configs"]["schema_catalog_max_distinct"])
+
+        # SQL executor
+        sql_executor_cfg = cfg["sql_executor"]
+        self.sql_executor_pool_size = int(sql_executor_cfg["pool_size"])
+        self.sql_executor_timeout_seconds = float(sql_executor_cfg["timeout_seconds"])
+        self.sql_executor_max_rows = int(sql_executor_cfg["max_rows"])
+        self.sql_executor_max_bytes = int(sql_executor_cfg["max_bytes"])
+
+        # SQL cache
+        sql_cache_cfg = cfg["sql_cache"]
+        self.sql_cache_enabled = bool(sql_cache_cfg["enabled"])
+        self.sql_cache_max_questions = int(sql_cache_cfg["max_questions"])
+        self.sql_cache_max_results = int(sql_cache_cfg["max_results"])
+        self.sql_cache_persist_path = str(here(sql_cache_cfg["persist_path"])) if sql_cache_cfg["persist_path"] else None
+
+        # SQL query log and tuning
+        sql_tuning_cfg = cfg["sql_tuning"]
+        self.sql_query_log_path = str(here(sql_tuning_cfg["query_log_path"])) if sql_tuning_cfg["query_log_path"] else None
+        self.sql_query_log_max_rows = int(sql_tuning_cfg["query_log_max_rows"])
+        self.sql_rewrite_to_rollups = bool(sql_tuning_cfg["rewrite_to_rollups"])
+        self.sql_tuning_min_query_count = int(sql_tuning_cfg["min_query_count"])
+        self.sql_tuning_max_index_columns = int(sql_tuning_cfg["max_index_columns"])
+        self.sql_tuning_rollup_max_groups = int(sql_tuning_cfg["rollup_max_groups"])
+
+        # Semantic answer cache
+        answer_cache_cfg = cfg["answer_cache"]
+        self.answer_cache_enabled = bool(answer_cache_cfg["enabled"])
+        self.answer_cache_threshold = float(answer_cache_cfg["similarity_threshold"])
+        self.answer_cache_ttl_seconds = float(answer_cache_cfg["ttl_seconds"])
+        self.answer_cache_max_entries = int(answer_cache_cfg["max_entries"])
+        self.answer_cache_skip_workers = list(answer_cache_cfg["skip_workers"])
 
         # Web Search
         self.tavily_max_results = int(cfg["tavily_search_api"]["tavily_search_max_results"])
+        self.tavily_backend = cfg["tavily_search_api"]["backend"]
+        self.tavily_base_url = cfg["tavily_search_api"]["base_url"]
+        self.tavily_timeout_seconds = float(cfg["tavily_search_api"]["timeout_seconds"])
+        self.tavily_cache_ttl_seconds = float(cfg["tavily_search_api"]["cache_ttl_seconds"])
+        self.tavily_cache_max_entries = int(cfg["tavily_search_api"]["cache_max_entries"])
 
         # Whisper
         self.whisper_model = cfg["whisper_config"]["model"]
         self.whisper_provider = cfg["whisper_config"]["provider"]
+        self.whisper_url = cfg["whisper_config"]["url"]
+        self.whisper_timeout_seconds = float(cfg["whisper_config"]["timeout_seconds"])
 
         # PlayAI
         self.playai_model = cfg["playai_config"]["model"]
         self.playai_voice = cfg["playai_config"]["voice"]
         self.playai_response_format = cfg["playai_config"]["response_format"]
+        self.playai_url = cfg["playai_config"]["url"]
+        self.playai_timeout_seconds = float(cfg["playai_config"]["timeout_seconds"])
+        self.tts_chunk_min_chars = int(cfg["playai_config"]["chunk_min_chars"])
+        self.tts_chunk_max_chars = int(cfg["playai_config"]["chunk_max_chars"])
+        self.tts_max_concurrency = int(cfg["playai_config"]["max_concurrency"])
+        self.tts_cache_max_bytes = int(float(cfg["playai_config"]["cache_max_mb"]) * 1024 * 1024)
+        self.speech_pool_size = int(cfg["speech_http"]["pool_size"])
+
+        # History compaction
+        compaction_cfg = cfg["history_compaction"]
+        self.compaction_enabled = bool(compaction_cfg["enabled"])
+        self.compaction_token_budget = int(compaction_cfg["token_budget"])
+        self.compaction_keep_last_turns = int(compaction_cfg["keep_last_turns"])
+
+        # Pre-router
+        pre_router_cfg = cfg["pre_router"]
+        self.pre_router_enabled = bool(pre_router_cfg["enabled"])
+        self.pre_router_similarity_threshold = float(pre_router_cfg["similarity_threshold"])
+        self.pre_router_margin_threshold = float(pre_router_cfg["margin_threshold"])
+
+        # Termination policy
+        termination_cfg = cfg["termination_policy"]
+        self.termination_enabled = bool(termination_cfg["enabled"])
+        self.termination_min_answer_chars = {worker: int(n) for worker, n in termination_cfg["min_answer_chars"].items()}
+
+        # Parallel RAG + SQL branches
+        self.parallel_enabled = bool(cfg["parallel_workers"]["enabled"])
+        self.parallel_branch_timeout = float(cfg["parallel_workers"]["branch_timeout_seconds"])
+
+        # Speculative execution
+        speculation_cfg = cfg["speculative_execution"]
+        self.speculation_enabled = bool(speculation_cfg["enabled"])
+        self.speculation_min_confidence = float(speculation_cfg["min_confidence"])
+        self.speculation_allowed_workers = list(speculation_cfg["allowed_workers"])
 
         # Graph
         self.thread_id = str(cfg["graph_configs"]["thread_id"])
+        self.checkpoint_max_threads = int(cfg["graph_configs"]["checkpoint_max_threads"])
+        self.checkpoint_ttl_seconds = float(cfg["graph_configs"]["checkpoint_ttl_seconds"])
+        self.checkpoint_max_per_thread = int(cfg["graph_configs"]["checkpoint_max_per_thread"])
+
+        # Streamlit front end
+        app_cfg = cfg["streamlit_app"]
+        self.app_connect_timeout = float(app_cfg["connect_timeout_seconds"])
+        self.app_read_timeout = float(app_cfg["read_timeout_seconds"])
+        self.app_retries = int(app_cfg["retries"])
+        self.app_tts_workers = int(app_cfg["tts_workers"])
+        self.app_audio_turns_kept = int(app_cfg["audio_turns_kept"])
+        self.app_history_turns_rendered = int(app_cfg["history_turns_rendered"])
 
         # Centralized API keys
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -59,7 +171,7 @@ class LoadToolsConfig:
             missing_keys.append("GROQ_API_KEY")
         if not self.tavily_api_key:
             missing_keys.append("TAVILY_API_KEY")
-        if not self.pinecone_api_key:
+        if self.rag_backend == "pinecone" and not self.pinecone_api_key:
             missing_keys.append("PINECONE_API_KEY")
 
         if missing_keys:
@@ -1,32 +1,133 @@
+import json
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from pydantic import BaseModel
-from src.agent_graph.multiagent_supervisor import custom_graph_invoke_output
+from src.agent_graph.multiagent_supervisor import custom_graph_invoke_output, stream_graph_events, warm_worker_agents, memory
+from src.agent_graph.pdf_rag_tool import warm_rag_resources
+from src.agent_graph.sql_tool import warm_sql_resources
+from src.agent_graph.history_compaction import compaction_metrics
+from src.agent_graph.pre_router import routing_metrics
+from src.agent_graph.termination_policy import termination_metrics
+from src.agent_graph.speculation import speculation_metrics
+from src.agent_graph.sql_cache import sql_cache
+from src.agent_graph.tavily_search_tool import search_cache
+from src.agent_graph.answer_cache import answer_cache
+from src.utility import close_llm_clients, is_embedding_model_ready
+
+def warm_sql():
+    try:
+        warm_sql_resources()
+        print("✅ SQL schema catalog is ready")
+    except Exception as e:
+        print(f"❌ SQL warm-up failed: {e}")
+
+def warm_rag():
+    try:
+        warm_rag_resources()
+        print("✅ Embedding model and vector index are ready")
+    except Exception as e:
+        print(f"❌ RAG warm-up failed: {e}")
+
+# Startup / shutdown hooks
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the worker agents for every configured model before serving traffic
+    warm_worker_agents()
+    # Build or load the SQL schema catalog so no introspection runs on the request path
+    await asyncio.to_thread(warm_sql)
+    # Load the embedding model in the background; /ready reports when it is resident
+    rag_warmup = asyncio.create_task(asyncio.to_thread(warm_rag))
+    yield
+    await rag_warmup
+    # Close pooled keep-alive LLM connections on shutdown
+    await close_llm_clients()
+    # Commit SQL cache writes still queued for the background writer
+    await asyncio.to_thread(sql_cache.flush)
 
 # Initialize FastAPI app with a custom title
 app = FastAPI(
     title="Medical AI Agent API",
     description="A multi-agent medical chatbot powered by LangGraph and OpenAI.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Define schema for query requests
 class QueryRequest(BaseModel):
     question: str
     model_name: str
+    session_id: Optional[str] = None  # conversation thread; a new one is started when omitted
 
 # Chat endpoint
 @app.post("/chat/", summary="Query the Medical AI Agent")
 async def chat_endpoint(request: QueryRequest):
     """
-    Accepts a medical question and selected LLM model.
-    Returns a response from the most suitable agent.
+    Accepts a medical question, selected LLM model and optional session id.
+    Returns a response from the most suitable agent and the session id to continue the conversation.
     """
+    session_id = request.session_id or uuid.uuid4().hex
     try:
-        response = custom_graph_invoke_output(request.question, request.model_name)
-        return {"response": response}
+        response = await custom_graph_invoke_output(request.question, request.model_name, session_id)
+        return {"response": response, "session_id": session_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Streaming chat endpoint (Server-Sent Events)
+@app.post("/chat/stream", summary="Stream the Medical AI Agent's answer as Server-Sent Events")
+async def chat_stream_endpoint(request: QueryRequest):
+    """
+    Accepts a medical question and selected LLM model.
+    Streams `route` (worker picked by the supervisor), `token` (worker answer tokens) and a final `final` event
+    carrying the agent name, the same response string as /chat/ and the session id.
+    """
+    session_id = request.session_id or uuid.uuid4().hex
+
+    async def event_source():
+        async for event in stream_graph_events(request.question, request.model_name, session_id):
+            if event["event"] == "final":
+                event["data"]["session_id"] = session_id
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream")
+
+# Runtime metrics
+@app.get("/metrics", summary="Runtime metrics")
+async def metrics_endpoint():
+    """
+    Returns in-process metrics, one group per key:
+
+    - checkpoints: live conversation threads and checkpoint memory held
+    - history_compaction: prompt tokens saved by folding old turns into the summary
+    - routing: pre-router decisions and their agreement with the supervisor
+    - termination: how often a worker ended the query without another supervisor hop
+    - speculation: hit rate and latency saved/wasted by speculative worker runs
+    - sql_cache, web_search_cache, answer_cache: entries, hits and misses of each cache
+    """
+    return {
+        "checkpoints": memory.stats(),
+        "history_compaction": compaction_metrics,
+        "routing": routing_metrics,
+        "termination": termination_metrics,
+        "speculation": speculation_metrics,
+        "sql_cache": sql_cache.stats(),
+        "web_search_cache": search_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+    }
+
+# Readiness probe for the load balancer
+@app.get("/ready", summary="Readiness probe")
+async def ready_endpoint():
+    """
+    Returns 200 once the embedding model is resident in memory, 503 while the worker is still warming up.
+    """
+    if not is_embedding_model_ready():
+        raise HTTPException(status_code=503, detail="Embedding model is still loading")
+    return {"status": "ready"}
+
 # Remove this block if you're using Docker's CMD to run uvicorn
 # Run the app locally using Uvicorn
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from typing import List, NamedTuple, Optional
+import numpy as np
+from configs.load_tools_config import LoadToolsConfig
+from src.utility import get_embedding_model, is_embedding_model_ready
+from src.vector_index.ingest import ingest_manifest_path
+from src.vector_index.local_index import normalize_rows
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# Questions that lean on the conversation ("what about men?", "and for those tables?") are only
+# answered from the cache at the start of a session, where there is no conversation to lean on
+_FOLLOW_UP = re.compile(
+    r"^\s*(and|also|what about|how about|same|then|so)\b|\b(it|its|that|those|these|they|them|this|above|previous|earlier)\b",
+    re.I,
+)
+
+
+class CachedAnswer(NamedTuple):
+    agent_name: str
+    content: str        # the final message text
+    response: str       # the "Agent: ...\nAnswer: ..." string returned to the client
+    question: str       # the question it answered
+    similarity: float
+
+
+class AnswerLookup(NamedTuple):
+    hit: Optional[CachedAnswer]
+    vector: Optional[np.ndarray]  # embedding of the question, reused when its answer is stored
+
+
+# Numbers and quoted values: "patients over 60" and "patients over 70" embed almost identically
+_LITERAL = re.compile(r"\d+(?:\.\d+)?|\"[^\"]*\"|'[^']*'")
+
+
+def is_follow_up(question: str) -> bool:
+    return bool(_FOLLOW_UP.search(question))
+
+
+def literal_tokens(question: str) -> List[str]:
+    """Numeric and quoted tokens of a question, which must match exactly for a cached answer to apply."""
+    return sorted(token.lower() for token in _LITERAL.findall(question))
+
+
+def data_version() -> tuple:
+    """Versions of the data answers are built from: the SQL database file and the last RAG index ingestion."""
+    def mtime(path: str):
+        return os.path.getmtime(path) if os.path.exists(path) else None
+    return mtime(tool_cfg.sql_db_path), mtime(ingest_manifest_path(tool_cfg.rag_backend))
+
+
+class SemanticAnswerCache:
+    """
+    Cache of final graph answers keyed by question meaning.
+
+    Questions are embedded with the RAG embedding model and compared by cosine similarity against the
+    stored questions (exact search over a normalized matrix). A stored answer is returned when the best
+    match clears the similarity threshold, has the same numbers and quoted values, was produced by the
+    same model_name and is younger than the TTL. Entries are dropped once the health database or the
+    RAG index changes. Answers from workers in skip_workers (e.g. websearch, whose results go stale, or
+    chat, which depends on the conversation) are never stored.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: float, max_entries: int, skip_workers: List[str]) -> None:
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.skip_workers = set(skip_workers)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._entries = []  # parallel to _vectors rows: {"question", "tokens", "model_name", "agent_name", "content", "response", "created", "data_version"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _embed(self, question: str) -> np.ndarray:
+        return normalize_rows(get_embedding_model().embed_query(question))
+
+    def _expire(self, version: tuple) -> None:
+        now = time.time()
+        keep = [
+            i for i, e in enumerate(self._entries)
+            if now - e["created"] < self.ttl_seconds and e["data_version"] == version
+        ]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep]
+
+    def lookup(self, question: str, model_name: str) -> AnswerLookup:
+        """Best fresh answer to a question with the same meaning from the same model, if any."""
+        vector = self._embed(question)
+        tokens = literal_tokens(question)
+        with self._lock:
+            self._expire(data_version())
+            if self._entries:
+                scores = self._vectors @ vector
+                for i in np.argsort(-scores):
+                    if scores[i] < self.threshold:
+                        break
+                    entry = self._entries[i]
+                    if entry["model_name"] == model_name and entry["tokens"] == tokens:
+                        self.hits += 1
+                        return AnswerLookup(
+                            CachedAnswer(entry["agent_name"], entry["content"], entry["response"], entry["question"], float(scores[i])),
+                            vector,
+                        )
+            self.misses += 1
+        return AnswerLookup(None, vector)
+
+    def store(self, question: str, model_name: str, agent_name: Optional[str], content: str, response: str,
+              vector: Optional[np.ndarray] = None) -> bool:
+        """Stores a final answer unless its worker opted out. Returns whether it was stored."""
+        if not agent_name or agent_name in self.skip_workers or agent_name == "Unknown":
+            return False
+        if vector is None:
+            vector = self._embed(question)
+        entry = {
+            "question": question,
+            "tokens": literal_tokens(question),
+            "model_name": model_name,
+            "agent_name": agent_name,
+            "content": content,
+            "response": response,
+            "created": time.time(),
+            "data_version": data_version(),
+        }
+        with self._lock:
+            if self._vectors.size == 0:
+                self._vectors = vector[None, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector[None, :]])
+            self._entries.append(entry)
+            if len(self._entries) > self.max_entries:
+                # oldest first: entries are appended in creation order
+                drop = len(self._entries) - self.max_entries
+                self._entries = self._entries[drop:]
+                self._vectors = self._vectors[drop:]
+            self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+            }
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=tool_cfg.answer_cache_threshold,
+    ttl_seconds=tool_cfg.answer_cache_ttl_seconds,
+    max_entries=tool_cfg.answer_cache_max_entries,
+    skip_workers=tool_cfg.answer_cache_skip_workers,
+)
+
+
+async def lookup_answer(question: str, model_name: str, has_history: bool) -> AnswerLookup:
+    """
+    Cache lookup for the graph entry points. Skipped (no hit, no vector) when the cache is disabled,
+    the embedding model is still loading, or the question is a follow-up within a conversation.
+    """
+    if not tool_cfg.answer_cache_enabled or not is_embedding_model_ready():
+        return AnswerLookup(None, None)
+    if has_history and is_follow_up(question):
+        return AnswerLookup(None, None)
+    try:
+        return await asyncio.to_thread(answer_cache.lookup, question, model_name)
+    except Exception as e:
+        print(f"⚠️ Answer cache lookup failed: {e}")
+        return AnswerLookup(None, None)
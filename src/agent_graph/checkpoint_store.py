@@ -0,0 +1,156 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-memory LangGraph checkpointer with bounded memory.
+
+    One conversation thread per session. Whole threads are evicted least-recently-used first when
+    there are more than max_threads of them, or when they have been idle for ttl_seconds. Within a
+    thread only the newest max_checkpoints_per_thread checkpoints (per namespace) are kept, together
+    with the channel blobs they reference; the latest checkpoint already holds the full state.
+
+    Attributes:
+        evicted_threads (int): Threads dropped by the LRU/TTL policy since start-up.
+    """
+
+    def __init__(self, max_threads: int, ttl_seconds: float, max_checkpoints_per_thread: int) -> None:
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+        self.evicted_threads = 0
+
+        # thread_id -> last access time, least recently used first
+        self._last_access = OrderedDict()
+        # thread_id -> {(checkpoint_ns, checkpoint_id): {(channel, version)} referenced by that checkpoint}
+        self._checkpoint_versions = {}
+        # thread_id -> keys this thread owns in self.blobs / self.writes
+        self._blob_keys = {}
+        self._write_keys = {}
+        self._lock = threading.RLock()
+
+    # ---------- policy ----------
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._last_access:
+            thread_id, last_access = next(iter(self._last_access.items()))
+            if len(self._last_access) <= self.max_threads and now - last_access <= self.ttl_seconds:
+                break
+            self._drop_thread(thread_id)
+            self.evicted_threads += 1
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Keeps the newest checkpoints of a thread namespace and the blobs they still reference."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+
+        # Checkpoint ids are time-ordered, so sorting puts the oldest first
+        for checkpoint_id in sorted(checkpoints)[:excess]:
+            del checkpoints[checkpoint_id]
+            self._checkpoint_versions[thread_id].pop((checkpoint_ns, checkpoint_id), None)
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys.get(thread_id, set()).discard(write_key)
+
+        live = set()
+        for checkpoint_id in checkpoints:
+            live |= self._checkpoint_versions[thread_id].get((checkpoint_ns, checkpoint_id), set())
+        thread_blobs = self._blob_keys.get(thread_id, set())
+        for key in [k for k in thread_blobs if k[1] == checkpoint_ns and (k[2], k[3]) not in live]:
+            self.blobs.pop(key, None)
+            thread_blobs.discard(key)
+
+    def _drop_thread(self, thread_id: str) -> None:
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        for key in self._blob_keys.pop(thread_id, set()):
+            self.blobs.pop(key, None)
+        for key in self._write_keys.pop(thread_id, set()):
+            self.writes.pop(key, None)
+        self._checkpoint_versions.pop(thread_id, None)
+        self._last_access.pop(thread_id, None)
+
+    # ---------- checkpointer API ----------
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._evict()
+            result = super().get_tuple(config)
+            if thread_id in self._last_access:
+                self._touch(thread_id)
+            return result
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        with self._lock:
+            items = list(super().list(config, filter=filter, before=before, limit=limit))
+        yield from items
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            self._checkpoint_versions.setdefault(thread_id, {})[(checkpoint_ns, checkpoint["id"])] = set(
+                checkpoint["channel_versions"].items()
+            )
+            self._blob_keys.setdefault(thread_id, set()).update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+            self._touch(thread_id)
+            self._prune(thread_id, checkpoint_ns)
+            self._evict()
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys.setdefault(thread_id, set()).add(
+                (thread_id, config["configurable"]["checkpoint_ns"], config["configurable"]["checkpoint_id"])
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop_thread(thread_id)
+
+    # ---------- metrics ----------
+
+    def stats(self, thread_id: Optional[str] = None) -> dict:
+        """Live threads, stored checkpoints and serialized bytes held (for all threads or one)."""
+        with self._lock:
+            thread_ids = [thread_id] if thread_id else list(self._last_access)
+            checkpoints, bytes_held = 0, 0
+            for t in thread_ids:
+                for namespace in self.storage.get(t, {}).values():
+                    checkpoints += len(namespace)
+                    for saved_checkpoint, saved_metadata, _ in namespace.values():
+                        bytes_held += len(saved_checkpoint[1]) + len(saved_metadata[1])
+                for key in self._blob_keys.get(t, ()):
+                    if key in self.blobs:
+                        bytes_held += len(self.blobs[key][1])
+                for key in self._write_keys.get(t, ()):
+                    for write in self.writes.get(key, {}).values():
+                        bytes_held += len(write[2][1])
+            return {
+                "live_threads": len(self._last_access),
+                "checkpoints": checkpoints,
+                "bytes_held": bytes_held,
+                "evicted_threads": self.evicted_threads,
+                "max_threads": self.max_threads,
+                "ttl_seconds": self.ttl_seconds,
+                "max_checkpoints_per_thread": self.max_checkpoints_per_thread,
+            }
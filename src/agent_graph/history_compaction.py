@@ -0,0 +1,91 @@
+from typing import List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from configs.load_tools_config import LoadToolsConfig
+from src.utility import get_llm
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# Running totals across requests, exposed through /metrics
+compaction_metrics = {"requests": 0, "compactions": 0, "tokens_saved_total": 0, "last_tokens_saved": 0}
+
+summary_prompt = """
+You maintain a running summary of a conversation between a user and a medical AI assistant.
+Merge the existing summary with the new conversation turns into one concise summary.
+Keep names, facts the user shared about themselves, questions asked, and the key points of each answer
+(numbers, guideline recommendations, dataset findings). Drop greetings and filler.
+Return only the summary text.
+"""
+
+
+def _split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Groups messages into turns, each starting at a user message."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def summary_message(summary: str) -> List[SystemMessage]:
+    """The rolling summary as a system message to put in front of the history (empty if no summary yet)."""
+    if not summary:
+        return []
+    return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")]
+
+
+def _transcript(messages: List[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        speaker = "User" if isinstance(message, HumanMessage) else (getattr(message, "name", None) or "Assistant")
+        lines.append(f"{speaker}: {message.content}")
+    return "\n".join(lines)
+
+
+async def compact_history(messages: List[BaseMessage], summary: str, folded_tokens: int,
+                          model_name: str) -> Tuple[dict, int]:
+    """
+    Folds older turns into the rolling summary once the history exceeds the token budget.
+
+    The last keep_last_turns turns stay verbatim; older messages are summarized with the existing
+    summary and removed from the thread state.
+
+    Args:
+        messages (List[BaseMessage]): The thread's current messages.
+        summary (str): Existing rolling summary ("" if none).
+        folded_tokens (int): Tokens of all messages folded into the summary so far.
+        model_name (str): LLM used to write the summary.
+
+    Returns:
+        Tuple[dict, int]: (state update, prompt tokens saved per LLM call in this request).
+    """
+    update = {}
+    history_tokens = count_tokens_approximately(messages)
+    turns = _split_turns(messages)
+
+    if history_tokens > tool_cfg.compaction_token_budget and len(turns) > tool_cfg.compaction_keep_last_turns:
+        keep_from = len(turns) - tool_cfg.compaction_keep_last_turns
+        older = [message for turn in turns[:keep_from] for message in turn]
+
+        llm = get_llm(model_name)
+        response = await llm.ainvoke([
+            SystemMessage(content=summary_prompt),
+            HumanMessage(content=f"Existing summary:\n{summary or '(none)'}\n\nNew turns:\n{_transcript(older)}"),
+        ])
+        summary = response.content.strip()
+        folded_tokens += count_tokens_approximately(older)
+        update = {
+            "summary": summary,
+            "folded_tokens": folded_tokens,
+            "messages": [RemoveMessage(id=message.id) for message in older],
+        }
+        compaction_metrics["compactions"] += 1
+
+    tokens_saved = max(0, folded_tokens - count_tokens_approximately(summary_message(summary)))
+    compaction_metrics["requests"] += 1
+    compaction_metrics["tokens_saved_total"] += tokens_saved
+    compaction_metrics["last_tokens_saved"] = tokens_saved
+    return update, tokens_saved
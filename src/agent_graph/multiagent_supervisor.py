@@ -1,14 +1,21 @@
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk
 from langgraph.prebuilt import create_react_agent
 from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from typing import Literal
+import asyncio
+import threading
+from typing import Annotated, AsyncIterator, Literal, Optional
 
 from typing_extensions import TypedDict
 from langgraph.types import Command
 from src.agent_graph.pdf_rag_tool import query_pdf_chunks
 from src.agent_graph.sql_tool import query_health_sqldb
 from src.agent_graph.tavily_search_tool import query_tavily_web_search
+from src.agent_graph.checkpoint_store import BoundedMemorySaver
+from src.agent_graph.history_compaction import compact_history, summary_message
+from src.agent_graph.pre_router import pre_router, record_pre_route, record_llm_route
+from src.agent_graph.termination_policy import should_finish, record_termination
+from src.agent_graph.speculation import SpeculativeRun, can_speculate
+from src.agent_graph.answer_cache import AnswerLookup, answer_cache, lookup_answer
 from configs.load_tools_config import LoadToolsConfig
 from src.utility import get_llm
 
@@ -16,27 +23,38 @@ from src.utility import get_llm
 tool_cfg = LoadToolsConfig()
 
 #Define state for the multi-agent system
+def _branch_answers_reducer(current: Optional[list], update: Optional[list]) -> list:
+    """Accumulates parallel branch results; an update of None resets them."""
+    if update is None:
+        return []
+    return (current or []) + update
+
 class State(MessagesState):
     next: str
+    summary: str        # rolling summary of turns folded out of "messages"
+    folded_tokens: int  # tokens of all messages folded into the summary
+    branch_answers: Annotated[list, _branch_answers_reducer]  # parallel RAG/SQL results awaiting merge
 
 #Define router class for supervisor node
 class Router(TypedDict):
     """
     Supervisor output schema.
     The 'next' field determines the next worker or whether the task is finished.
-    Must be one of: RAG, SQL, websearch, chat, FINISH.
+    Must be one of: RAG, SQL, RAG_SQL, websearch, chat, FINISH.
     """
-    next: Literal["RAG", "SQL", "websearch", "chat", "FINISH"]
+    next: Literal["RAG", "SQL", "RAG_SQL", "websearch", "chat", "FINISH"]
 
 #Define all prompts for agents
 rag_agent_prompt = """
 You specialize in answering questions about GUIDELINES FOR INFECTION PREVENTION AND 
 CONTROL using indexed PDF documents. Provide comprehensive, evidence-based answers.
+Base your answer on the guideline passages returned by your tool and cite their source PDFs.
 """
 
 sql_agent_prompt = """
 You can only answer queries related to Stroke_Prediction_Dataset, water_pollution_disease, 
 survey_lung_cancer, Breast_Cancer tables from health_databse.db.
+Answer from the SQL queries and result rows returned by your tool; explain what the numbers mean.
 """
 
 # websearch_system_prompt = """
@@ -88,57 +106,163 @@ Do not hallucinate tools — only use built-in capabilities.
 If the question is unrelated to your scope, respond that another agent might be better suited.
 """
 
+# ---------- WORKER AGENT REGISTRY ----------
+
+# worker -> (agent prompt, tool factory taking the model name)
+worker_specs = {
+    "RAG": (rag_agent_prompt, lambda model_name: [query_pdf_chunks(model_name)]),
+    "SQL": (sql_agent_prompt, lambda model_name: [query_health_sqldb(model_name)]),
+    "websearch": (websearch_agent_prompt, lambda model_name: [query_tavily_web_search]),
+    "chat": (chat_agent_prompt, lambda model_name: []),
+}
+
+# (worker, model_name) -> compiled ReAct agent, shared across requests and threads
+_worker_agents = {}
+_worker_agents_lock = threading.Lock()
+
+def get_worker_agent(worker: str, model_name: str):
+    """Returns the compiled ReAct agent for a worker and model, building it on first use."""
+    key = (worker, model_name)
+    agent = _worker_agents.get(key)
+    if agent is not None:
+        return agent
+
+    with _worker_agents_lock:
+        if key not in _worker_agents:
+            agent_prompt, make_tools = worker_specs[worker]
+            # checkpointer=False: worker runs are stateless, so they don't write subgraph checkpoints into the session thread
+            _worker_agents[key] = create_react_agent(
+                get_llm(model_name), tools=make_tools(model_name), prompt=agent_prompt, checkpointer=False
+            )
+        return _worker_agents[key]
+
+def warm_worker_agents(model_names: list = None) -> None:
+    """Compiles every worker agent for the given models (default: all models in tools_config.yaml)."""
+    for model_name in model_names or tool_cfg.llm_models:
+        try:
+            for worker in worker_specs:
+                get_worker_agent(worker, model_name)
+        except ValueError as e:
+            print(f"⚠️ Skipping worker agent warm-up for {model_name}: {e}")
+
+def invalidate_worker_agents(model_name: str = None) -> None:
+    """Drops cached worker agents (all, or only those for one model), e.g. after a config reload."""
+    with _worker_agents_lock:
+        for key in list(_worker_agents):
+            if model_name is None or key[1] == model_name:
+                del _worker_agents[key]
+
 # ---------- NODES ----------
 
-def rag_node(state: State, config: dict) -> Command[Literal["supervisor"]]:
+def _worker_input(state: State) -> dict:
+    """Worker agent input: the rolling summary (if any) followed by the recent messages."""
+    return {"messages": summary_message(state.get("summary", "")) + state["messages"]}
+
+def _next_after_worker(worker: str, answer: str) -> str:
+    """Ends the graph when the worker's answer is complete; otherwise hands back to the supervisor."""
+    finished = should_finish(worker, answer)
+    record_termination(worker, finished)
+    return END if finished else "supervisor"
+
+async def compact_node(state: State, config: dict) -> dict:
+    """Keeps the history under the token budget by folding older turns into the rolling summary."""
+    if not tool_cfg.compaction_enabled:
+        return {}
     try:
         model_name = config["configurable"]["model_name"]
-        llm = get_llm(model_name)
-        rag_agent = create_react_agent(llm, tools=[query_pdf_chunks(model_name)], prompt=rag_agent_prompt)
-        result = rag_agent.invoke(state)
-        return Command(update={"messages": [AIMessage(content=result["messages"][-1].content, name="RAG")]}, goto="supervisor")        
+        update, tokens_saved = await compact_history(
+            state["messages"], state.get("summary", ""), state.get("folded_tokens", 0), model_name
+        )
+        if tokens_saved:
+            print(f"🗜️ History compaction: ~{tokens_saved} prompt tokens saved per LLM call")
+        return update
     except Exception as e:
-        return Command(update={"messages": [AIMessage(content=f"RAG agent error: {str(e)}", name="RAG")]}, goto="supervisor")
+        print(f"History compaction error: {e}")
+        return {}
 
-def sql_node(state: State, config: dict) -> Command[Literal["supervisor"]]:
+async def _run_worker(worker: str, state: State, config: dict) -> str:
+    """Runs a worker's ReAct agent on the current history and returns its answer text."""
+    agent = get_worker_agent(worker, config["configurable"]["model_name"])
+    result = await agent.ainvoke(_worker_input(state))
+    return result["messages"][-1].content
+
+async def rag_node(state: State, config: dict) -> Command[Literal["supervisor", "__end__"]]:
     try:
-        model_name = config["configurable"]["model_name"]
-        llm = get_llm(model_name)
-        sql_agent = create_react_agent(llm, tools=[query_health_sqldb(model_name)], prompt=sql_agent_prompt)
+        answer = await _run_worker("RAG", state, config)
+        return Command(update={"messages": [AIMessage(content=answer, name="RAG")]}, goto=_next_after_worker("RAG", answer))
+    except Exception as e:
+        return Command(update={"messages": [AIMessage(content=f"RAG agent error: {str(e)}", name="RAG")]}, goto="supervisor")
 
+async def sql_node(state: State, config: dict) -> Command[Literal["supervisor", "__end__"]]:
+    try:
         # print("\n🧠 SQL agent state messages:") #debug lines
         # for m in state["messages"]:
         #     print(m)
 
-        result = sql_agent.invoke(state)
+        answer = await _run_worker("SQL", state, config)
+        print(f"🧾 SQL agent answered ({len(answer)} characters)")
 
-        final_content = result["messages"][-1].content.strip()#debug lines
-        print("🧾 SQL Agent result:", final_content) 
-
-        return Command(update={"messages": [AIMessage(content=result["messages"][-1].content, name="SQL")]}, goto="supervisor")        
+        return Command(update={"messages": [AIMessage(content=answer, name="SQL")]}, goto=_next_after_worker("SQL", answer))
     except Exception as e:
         return Command(update={"messages": [AIMessage(content=f"SQL agent error: {str(e)}", name="SQL")]}, goto="supervisor")
 
-def search_node(state: State, config: dict) -> Command[Literal["supervisor"]]:
+async def search_node(state: State, config: dict) -> Command[Literal["supervisor", "__end__"]]:
     try:
-        model_name = config["configurable"]["model_name"]
-        llm = get_llm(model_name)
-        search_agent = create_react_agent(llm, tools=[query_tavily_web_search], prompt=websearch_agent_prompt)        
-        result = search_agent.invoke(state)
-        return Command(update={"messages": [AIMessage(content=result["messages"][-1].content, name="websearch")]}, goto="supervisor")      
+        answer = await _run_worker("websearch", state, config)
+        return Command(update={"messages": [AIMessage(content=answer, name="websearch")]}, goto=_next_after_worker("websearch", answer))
     except Exception as e:
         return Command(update={"messages": [AIMessage(content=f"Websearch agent error: {str(e)}", name="websearch")]}, goto="supervisor")
    
-def chat_node(state: State, config: dict) -> Command[Literal["supervisor"]]:
+async def chat_node(state: State, config: dict) -> Command[Literal["supervisor", "__end__"]]:
     try:
-        model_name = config["configurable"]["model_name"]
-        llm = get_llm(model_name)
-        chat_agent = create_react_agent(llm, tools=[], prompt=chat_agent_prompt)
-        result = chat_agent.invoke(state)
-        return Command(update={"messages": [AIMessage(content=result["messages"][-1].content, name="chat")]}, goto="supervisor")
+        answer = await _run_worker("chat", state, config)
+        return Command(update={"messages": [AIMessage(content=answer, name="chat")]}, goto=_next_after_worker("chat", answer))
     except Exception as e:
         return Command(update={"messages": [AIMessage(content=f"Chat agent error: {str(e)}", name="chat")]}, goto="supervisor")
 
+# ---------- PARALLEL RAG + SQL ----------
+parallel_route = "RAG_SQL"
+branch_workers = {"RAG_branch": "RAG", "SQL_branch": "SQL"}
+
+async def _run_branch(worker: str, state: State, config: dict) -> dict:
+    """Runs one parallel branch under the per-branch timeout; a slow or failing branch is dropped."""
+    try:
+        answer = await asyncio.wait_for(_run_worker(worker, state, config), timeout=tool_cfg.parallel_branch_timeout)
+        return {"branch_answers": [{"worker": worker, "answer": answer}]}
+    except asyncio.TimeoutError:
+        print(f"⏱️ {worker} branch dropped after {tool_cfg.parallel_branch_timeout}s")
+        return {"branch_answers": [{"worker": worker, "answer": None}]}
+    except Exception as e:
+        print(f"{worker} branch error: {e}")
+        return {"branch_answers": [{"worker": worker, "answer": None}]}
+
+async def rag_branch_node(state: State, config: dict) -> dict:
+    return await _run_branch("RAG", state, config)
+
+async def sql_branch_node(state: State, config: dict) -> dict:
+    return await _run_branch("SQL", state, config)
+
+branch_titles = {
+    "RAG": "From the infection prevention and control guidelines",
+    "SQL": "From the health datasets",
+}
+
+async def merge_node(state: State, config: dict) -> Command[Literal["supervisor", "__end__"]]:
+    """Combines the answers of the parallel RAG and SQL branches into one message."""
+    answers = [a for a in state.get("branch_answers", []) if a["answer"]]
+    if len(answers) == 1:
+        merged = answers[0]["answer"]
+    elif answers:
+        merged = "\n\n".join(f"### {branch_titles[a['worker']]}\n{a['answer']}" for a in answers)
+    else:
+        merged = "RAG+SQL agent error: both branches timed out or failed."
+
+    return Command(
+        # branch_answers=None clears the per-query branch results from the thread state
+        update={"messages": [AIMessage(content=merged, name="RAG+SQL")], "branch_answers": None},
+        goto=_next_after_worker(parallel_route, merged) if answers else "supervisor",
+    )
+
 # ---------- SUPERVISOR NODE ----------   
 members = ["RAG", "SQL", "websearch", "chat"]
 options = members + ["FINISH"]
@@ -155,7 +279,8 @@ You are a supervisor responsible for routing tasks to one of the following team
    - **Breast_Cancer**: Contains clinical and demographic features such as tumor stage (T and N stages), tumor size, differentiation grade, hormone receptor status, lymph node involvement, survival months, and patient status (alive/dead).
 3. **websearch** — Handles general or recent health questions not covered by the PDFs or SQL database.
 4. **chat** — Handles casual conversation, personal queries (e.g. name or greetings), math questions, and basic code generation.
-5. **FINISH** — If the question is fully answered, respond with FINISH.
+5. **RAG_SQL** — Runs RAG and SQL at the same time and merges their answers.
+6. **FINISH** — If the question is fully answered, respond with FINISH.
 
 Analyze user queries and route to the most appropriate agent. When responding, always provide complete and informative answers based on retrieved knowledge.
 If no relevant information is found, state that clearly instead of returning a blank response.
@@ -164,13 +289,14 @@ Your output must always include a well-formed summary or explanation.
 ### IMPORTANT INSTRUCTIONS:
 
 - You **must** return only a JSON object like: `{{ "next": "RAG" }}`.
-- Valid values for `"next"` are: `"RAG"`, `"SQL"`, `"websearch"`, `"chat"`, or `"FINISH"`.
+- Valid values for `"next"` are: `"RAG"`, `"SQL"`, `"RAG_SQL"`, `"websearch"`, `"chat"`, or `"FINISH"`.
 
 ### Decision Guidelines:
 
 1. If the question **is** related to **medical / health / pollution**, follow this flow:
    - First, route to `"RAG"` if it's about **infection prevention guidelines** (e.g. hygiene, pneumonia, antimicrobial resistance, etc), and it hasn't been used already.
    - Next, if the question involves **clinical or patient-level data, survival rates, disease stages, risk factors, or dataset-specific queries** (e.g. stroke prediction, water polution/pollution, Water Quality, waterborne diseases, hypertension, lung cancer, breast cancer, cancer stage), route to `"SQL"` if it hasn't yet been used.
+   - If the question plausibly needs **both** the infection prevention guidelines **and** the clinical datasets, and neither has been used yet, route to `"RAG_SQL"` instead of `"RAG"` followed by `"SQL"`.
    - Only use `"websearch"` if :
     - The question is medical/health-related,
     - AND neither `"RAG"` nor `"SQL"` have produced a complete or useful answer,
@@ -193,50 +319,167 @@ Your output must always include a well-formed summary or explanation.
 """
 
 
-def supervisor_node(state: State, config: dict)-> Command[Literal[*members, "__end__"]]:
+def _route(goto: str) -> Command:
+    """Command for a supervisor decision; RAG_SQL fans out to both branches at once (or falls back to RAG)."""
+    if goto == parallel_route:
+        if not tool_cfg.parallel_enabled:
+            return Command(goto="RAG", update={"next": "RAG"})
+        return Command(goto=list(branch_workers), update={"next": parallel_route, "branch_answers": None})
+    return Command(goto=goto, update={"next": goto})
+
+async def _speculative_answer(speculation: SpeculativeRun) -> Command:
+    """Supervisor result when it agreed with the speculative worker: the worker's answer, no extra hop."""
+    worker = speculation.worker
+    try:
+        answer = await speculation.result()
+        print(f"⚡ Speculative {worker} run used")
+        return Command(update={"next": worker, "messages": [AIMessage(content=answer, name=worker)]},
+                       goto=_next_after_worker(worker, answer))
+    except Exception as e:
+        return Command(update={"next": worker, "messages": [AIMessage(content=f"{worker} agent error: {str(e)}", name=worker)]},
+                       goto="supervisor")
+
+async def supervisor_node(state: State, config: dict)-> Command[Literal[*members, *branch_workers, "supervisor", "__end__"]]:
+    speculation = None
     try:
         model_name = config["configurable"]["model_name"]
         llm = get_llm(model_name)
         messages = [
             {"role": "system", "content": system_prompt},
-        ] + state["messages"]
+        ] + summary_message(state.get("summary", "")) + state["messages"]
 
         # print("\n📨 Supervisor input messages:") #debug lines
         # for msg in messages:
         #     print(msg)
 
-        response = llm.with_structured_output(Router).invoke(messages)
+        # First hop of a query: obvious questions are routed locally without an LLM call
+        first_hop = isinstance(state["messages"][-1], HumanMessage)
+        guess = None
+        if first_hop and (tool_cfg.pre_router_enabled or tool_cfg.speculation_enabled):
+            guess = await asyncio.to_thread(pre_router.classify, state["messages"][-1].content)
+            if tool_cfg.pre_router_enabled and pre_router.is_confident(guess):
+                record_pre_route(guess)
+                print(f"🧭 Pre-routed to {guess.route} ({guess.method}, confidence={guess.confidence:.2f})")
+                return _route(guess.route)
+
+        # Not sure enough to skip the LLM: start the likely worker while the supervisor decides
+        if first_hop and can_speculate(guess):
+            speculation = SpeculativeRun(guess.route, _run_worker(guess.route, state, config))
+
+        response = await llm.with_structured_output(Router).ainvoke(messages)
         #print("🧭 Supervisor routed to:", response) #debug line
 
         goto = response["next"]
+        if first_hop and tool_cfg.pre_router_enabled:
+            record_llm_route(guess, goto)
+        if speculation is not None:
+            if goto == speculation.worker:
+                # Handed off: awaiting its result cancels the run if this node is cancelled
+                handed_off, speculation = speculation, None
+                return await _speculative_answer(handed_off)
         if goto == "FINISH":
-            goto = END
+            return Command(goto=END, update={"next": END})
 
-        return Command(goto=goto, update={"next": goto})
+        return _route(goto)
     
     except Exception as e:
         print(f"Supervisor error: {e}")
         return Command(goto=END)
+    finally:
+        # Not handed off (other route, error, or this node was cancelled): stop the speculative worker
+        if speculation is not None:
+            speculation.cancel()
     
 # ---------- GRAPH SETUP ----------
-memory = MemorySaver()
+# One thread per session; memory bounded by LRU/TTL thread eviction and a per-thread checkpoint cap
+memory = BoundedMemorySaver(
+    max_threads=tool_cfg.checkpoint_max_threads,
+    ttl_seconds=tool_cfg.checkpoint_ttl_seconds,
+    max_checkpoints_per_thread=tool_cfg.checkpoint_max_per_thread,
+)
 builder = StateGraph(State)
-builder.add_edge(START, "supervisor")
+builder.add_edge(START, "compact")
+builder.add_edge("compact", "supervisor")
+builder.add_node("compact", compact_node)
 builder.add_node("supervisor", supervisor_node)
 builder.add_node("RAG", rag_node)
 builder.add_node("SQL", sql_node)
 builder.add_node("websearch", search_node)
 builder.add_node("chat", chat_node)
+builder.add_node("RAG_branch", rag_branch_node)
+builder.add_node("SQL_branch", sql_branch_node)
+builder.add_node("merge", merge_node)
+builder.add_edge(["RAG_branch", "SQL_branch"], "merge")  # merge waits for both branches
 graph = builder.compile(checkpointer=memory)
 
 # ---------- GRAPH INVOCATION ----------
-def custom_graph_invoke_output(user_question: str, model_name: str = "gpt-4o-mini"):
+def _graph_config(model_name: str, session_id: str) -> dict:
+    return {
+        "recursion_limit": 20,
+        "configurable": {
+            "thread_id": session_id or tool_cfg.thread_id,
+            "model_name": model_name,
+        }
+    }
+
+def _format_final_output(messages: list, user_question: str) -> tuple:
+    """
+    Formats the last graph message as the API response.
+
+    Returns:
+        tuple: (agent_name, response) where response is the "Agent: ...\nAnswer: ..." string
+               (agent_name is None when no meaningful answer was produced).
+    """
+    if messages and isinstance(messages, list):
+        final_message = messages[-1]
+        agent_name = getattr(final_message, "name", None)
+        content = final_message.content.strip()
+
+        if not content or content.lower() == user_question.lower():
+            return None, "⚠️ No meaningful response generated. The agent may have echoed the input."
+        
+        if not agent_name:
+            agent_name = "Unknown"
+
+        return agent_name, f"Agent: {agent_name}\nAnswer: {content}\n"
+    else:
+        return None, "⚠️ No meaningful response returned by any agent.\n"
+
+async def _cached_answer(user_question: str, model_name: str, config: dict) -> AnswerLookup:
+    """
+    Semantic answer cache lookup. On a hit the exchange is still appended to the conversation thread,
+    so follow-up questions see it as if the graph had answered.
+    """
+    state = await graph.aget_state(config)
+    lookup = await lookup_answer(user_question, model_name, has_history=bool(state.values.get("messages")))
+    if lookup.hit is not None:
+        print(f"⚡ Answer cache hit ({lookup.hit.similarity:.3f}): {lookup.hit.question!r}")
+        await graph.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=user_question),
+                          AIMessage(content=lookup.hit.content, name=lookup.hit.agent_name)]},
+            as_node="supervisor",
+        )
+    return lookup
+
+def _store_answer(lookup: AnswerLookup, user_question: str, model_name: str, messages: list,
+                  agent_name: Optional[str], response: str) -> None:
+    """Caches a graph answer when the lookup was eligible (it embedded the question) and the worker allows it."""
+    if lookup.vector is None or agent_name is None:
+        return
+    try:
+        answer_cache.store(user_question, model_name, agent_name, messages[-1].content.strip(), response, lookup.vector)
+    except Exception as e:
+        print(f"⚠️ Answer cache store failed: {e}")
+
+async def custom_graph_invoke_output(user_question: str, model_name: str = "gpt-4o-mini", session_id: str = None):
     """
     Invokes the graph and returns the final responding agent and its answer.
 
     Args:
         user_question (str): The user's question.
         model_name (str): LLM model (Ex. gpt, llama, mixtral).
+        session_id (str): Conversation thread to continue (defaults to graph_configs.thread_id).
 
     Returns:
         str: A clean, formatted response including the agent and final answer.
@@ -246,34 +489,84 @@ def custom_graph_invoke_output(user_question: str, model_name: str = "gpt-4o-min
             HumanMessage(content=user_question)
         ]
     }
-    config = {
-        "recursion_limit": 20,
-        "configurable": {
-            "thread_id": "chat_003",
-            "model_name": model_name,
-        }
-    }
+    config = _graph_config(model_name, session_id)
     try:
-        result = graph.invoke(inputs, config=config)
+        lookup = await _cached_answer(user_question, model_name, config)
+        if lookup.hit is not None:
+            return lookup.hit.response
+
+        result = await graph.ainvoke(inputs, config=config)
 
         # Get the messages list
         #Example: result = {'messages': [AIMessage(content='...', name='RAG'), AIMessage(content='...', name='SQL')]}
         messages = result.get("messages", [])
+        agent_name, response = _format_final_output(messages, user_question)
+        _store_answer(lookup, user_question, model_name, messages, agent_name, response)
+        return response
 
-        if messages and isinstance(messages, list):
-            final_message = messages[-1]
-            agent_name = getattr(final_message, "name", None)
-            content = final_message.content.strip()
-
-            if not content or content.lower() == user_question.lower():
-                return "⚠️ No meaningful response generated. The agent may have echoed the input."
-            
-            if not agent_name:
-                agent_name = "Unknown"
-
-            return f"Agent: {agent_name}\nAnswer: {content}\n"
-        else:
-            return "⚠️ No meaningful response returned by any agent.\n"
+    except Exception as e:
+        return f"❌ Error during graph invocation: {str(e)}"
 
+async def stream_graph_events(user_question: str, model_name: str = "gpt-4o-mini",
+                              session_id: str = None) -> AsyncIterator[dict]:
+    """
+    Runs the graph and yields events as they happen, for the SSE endpoint.
+
+    Yields:
+        dict: {"event": "route", "data": {"next": worker}} when the supervisor picks a worker,
+              {"event": "token", "data": {"agent": worker, "token": text}} for each answer token of a worker agent
+              (RAG and SQL tokens interleave on the RAG_SQL route; a speculative run's tokens arrive in one
+              burst right after its route event),
+              {"event": "final", "data": {"agent": agent_name, "response": response}} once at the end, where
+              response is the same string custom_graph_invoke_output returns.
+    """
+    inputs = {
+        "messages": [
+            HumanMessage(content=user_question)
+        ]
+    }
+    config = _graph_config(model_name, session_id)
+    try:
+        lookup = await _cached_answer(user_question, model_name, config)
+        if lookup.hit is not None:
+            yield {"event": "final", "data": {"agent": lookup.hit.agent_name, "response": lookup.hit.response}}
+            return
+
+        speculative_tokens = []  # tokens of a worker started speculatively inside the supervisor node
+        async for namespace, mode, chunk in graph.astream(
+            inputs, config=config, stream_mode=["updates", "messages"], subgraphs=True
+        ):
+            if mode == "updates" and not namespace:
+                if "supervisor" not in chunk:
+                    continue
+                update = chunk["supervisor"] or {}
+                if update.get("next") in members or update.get("next") == parallel_route:
+                    yield {"event": "route", "data": {"next": update["next"]}}
+                    # A speculative hit returns the worker's answer with the route; replay its tokens
+                    if update.get("messages"):
+                        for token in speculative_tokens:
+                            yield {"event": "token", "data": {"agent": update["next"], "token": token}}
+                speculative_tokens = []
+
+            elif mode == "messages" and namespace:
+                # Only the worker ReAct agent's own LLM node; skips tool-internal LLM calls and tool-call chunks
+                message, metadata = chunk
+                if not (metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessageChunk)
+                        and isinstance(message.content, str) and message.content):
+                    continue
+                node = namespace[0].split(":")[0]
+                worker = branch_workers.get(node, node)
+                if worker in members:
+                    yield {"event": "token", "data": {"agent": worker, "token": message.content}}
+                elif node == "supervisor":
+                    # Held back until the supervisor agrees with the guess; dropped if it routes elsewhere
+                    speculative_tokens.append(message.content)
+
+        state = await graph.aget_state(config)
+        messages = state.values.get("messages", [])
+        agent_name, response = _format_final_output(messages, user_question)
+        _store_answer(lookup, user_question, model_name, messages, agent_name, response)
     except Exception as e:
-        return f"❌ Error during graph invocation: {str(e)}"
\ No newline at end of file
+        agent_name, response = None, f"❌ Error during graph invocation: {str(e)}"
+
+    yield {"event": "final", "data": {"agent": agent_name, "response": response}}
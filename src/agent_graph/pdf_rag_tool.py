@@ -1,13 +1,15 @@
+import asyncio
+import threading
 from operator import itemgetter
 from typing import Callable
 from langchain.tools import tool
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
 from langchain.prompts import PromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from configs.load_tools_config import LoadToolsConfig
-from src.utility import get_llm
+from src.utility import get_llm, get_embedding_model
+from src.vector_index.local_index import LocalVectorIndex, LocalVectorStore
 
 # Load config
 tool_cfg = LoadToolsConfig()
@@ -19,46 +21,92 @@ prompt = PromptTemplate.from_template(
     "Question: {question}"
 )
 
+# Process-wide vector store (Pinecone index handle or local memory-mapped index), opened once
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+
+def get_vectorstore():
+    """Returns the shared vector store for the configured backend, opening it on first use."""
+    global _vectorstore
+    if _vectorstore is None:
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                # Model first: a missing or unreachable index must not keep /ready waiting for it
+                embedding = get_embedding_model()
+                if tool_cfg.rag_backend == "local":
+                    _vectorstore = LocalVectorStore(
+                        LocalVectorIndex(tool_cfg.rag_local_index_dir),
+                        embedding=embedding,
+                        search_mode=tool_cfg.rag_local_index_search,
+                        nprobe=tool_cfg.rag_ivf_nprobe,
+                    )
+                elif tool_cfg.rag_backend == "pinecone":
+                    pc = Pinecone(api_key=tool_cfg.pinecone_api_key)
+                    index = pc.Index(tool_cfg.rag_pinecone_index)
+                    _vectorstore = PineconeVectorStore(index=index, embedding=embedding)
+                else:
+                    raise ValueError(f"Unsupported RAG backend: {tool_cfg.rag_backend}")
+    return _vectorstore
+
+
+def warm_rag_resources() -> None:
+    """Loads the embedding model, then opens the vector index, ahead of the first query."""
+    get_embedding_model().embed_query("warm-up")
+    get_vectorstore()
+
+
+def format_context(docs: list, max_chars: int) -> str:
+    """Compact numbered chunks with their source, each trimmed to max_chars characters."""
+    lines = []
+    for i, doc in enumerate(docs, start=1):
+        text = " ".join(doc.page_content.split())
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(" ", 1)[0] + " …"
+        source = doc.metadata.get("source_pdf", "Unknown")
+        page = doc.metadata.get("page")
+        lines.append(f"[{i}] {text}\n(Source: {source}{f', p. {page}' if page else ''})")
+    return "\n\n".join(lines)
+
 
 def query_pdf_chunks(model_name: str) -> Callable:
     @tool
-    def ask_pdf_guidelines(question: str) -> str:
+    async def ask_pdf_guidelines(question: str) -> str:
         """
         Search the indexed medical "NATIONAL GUIDELINES FOR INFECTION PREVENTION AND CONTROL IN HEALTHCARE
         FACILITIES" PDFs using a semantic query and return raw matching content.
 
-        This tool uses the existing Pinecone index of PDFs to find relevant chunks
-        and returns them as-is (no formatting or generation). Intended for integration
-        with a main agent that handles reasoning or prompting.
+        This tool uses the configured vector index (Pinecone or local) of PDFs to find relevant chunks.
+        In "context" tool output mode it returns them as compact numbered passages (no generation), so
+        the calling agent writes the answer; in "answer" mode it answers from them with its own LLM call.
 
         Args:
             question (str): A natural language medical question.
                 Example: "What are the guidelines for ventilator-associated pneumonia?"
 
         Returns:
-            str: Joined raw document chunks with metadata for source PDF.
+            str: Numbered guideline passages with their source PDF, or a generated answer in "answer" mode.
         """
         try:
-            # Initialize LLM based on model name
-            llm = get_llm(model_name)
-            if not llm:
-                return f"Unsupported model: {model_name}"
-            
-            # Pinecone client
-            pc = Pinecone(api_key=tool_cfg.pinecone_api_key)
-            index = pc.Index(tool_cfg.rag_pinecone_index)
-
-            # Embedding and Vectorstore
-            embeddings = HuggingFaceEmbeddings(model_name=tool_cfg.rag_embedding_model)
-            vectorstore = PineconeVectorStore(index=index, embedding=embeddings)
-            #vectorstore = PineconeVectorStore(index_name=tool_cfg.rag_pinecone_index, embedding=embeddings)
+            # Shared embedding model + vector index (opened in a thread in case it is still cold)
+            vectorstore = await asyncio.to_thread(get_vectorstore)
 
-            # Search top K chunks
-            docs = vectorstore.similarity_search(question, k=tool_cfg.rag_k)
+            # Search top K chunks in a thread on the shared index handle (PineconeVectorStore's async
+            # search would open a new PineconeAsyncio client per query)
+            docs = await asyncio.to_thread(vectorstore.similarity_search, question, k=tool_cfg.rag_k)
 
             if not docs:
                 return "No matching content found."
 
+            # Context-only: the worker agent answers from the passages in its own generation
+            if tool_cfg.tool_output_mode == "context":
+                return format_context(docs, tool_cfg.tool_output_rag_chunk_chars)
+
+            # Initialize LLM based on model name
+            llm = get_llm(model_name)
+            if not llm:
+                return f"Unsupported model: {model_name}"
+
             # Join and return raw text chunks with source info
             joined_docs = "\n\n".join(
                 f"{doc.page_content.strip()}\n(Source: {doc.metadata.get('source_pdf', 'Unknown')})"
@@ -73,7 +121,7 @@ def query_pdf_chunks(model_name: str) -> Callable:
                 | StrOutputParser()
             )
 
-            return chain.invoke({"question": question})
+            return await chain.ainvoke({"question": question})
         except Exception as e:
             return f"Error querying PDF database: {str(e)}"
         
@@ -0,0 +1,200 @@
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from configs.load_tools_config import LoadToolsConfig
+from src.utility import get_embedding_model, is_embedding_model_ready
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# Running counters exposed through /metrics
+routing_metrics = {
+    "pre_routed": {"keyword": 0, "embedding": 0},
+    "llm_routed": 0,
+    "agree": 0,
+    "disagree": 0,
+    # guess confidence bucket (e.g. "0.6") -> [agreements, LLM-routed queries] for threshold tuning
+    "agreement_by_confidence": {},
+}
+
+
+class RouteGuess(NamedTuple):
+    route: str         # "RAG", "SQL", "RAG_SQL", "websearch" or "chat"
+    confidence: float  # 1.0 for keyword rules, cosine similarity of the best prototype otherwise
+    method: str        # "keyword" or "embedding"
+    margin: float = 1.0  # lead of the best route over the runner-up
+
+
+# ---------- KEYWORD RULES (from the supervisor's decision guidelines) ----------
+
+chat_patterns = [
+    # Greetings, small talk, personal questions
+    r"^\s*(hi|hello|hey|hiya|good (morning|afternoon|evening)|thanks|thank you|bye|goodbye)\b[\s!.,?]*\w{0,12}[\s!.?]*$",
+    r"^\s*(how are you|who are you|what('s| is) my name|my name is|tell me a joke)\b",
+    # Arithmetic ("What's 15 x 8?", "Calculate 2^8", "22 * 8")
+    r"^\s*((what('s| is)|calculate|compute|evaluate|solve)\s+)?[\d\s.,()+\-*/x×^%=]*\d[\d\s.,()+\-*/x×^%=]*[+\-*/x×^%][\d\s.,()+\-*/x×^%=]*\d[\s?]*$",
+    # Code writing
+    r"\b(write|generate|create|implement)\b.{0,40}\b(python|javascript|java|c\+\+|function|script|program|class|code)\b",
+]
+
+websearch_patterns = [
+    r"\b(weather|forecast|temperature in|news|headlines|stock price|score of|who won)\b",
+]
+
+rag_patterns = [
+    r"\binfection (prevention|control)\b",
+    r"\b(hand hygiene|hand washing|handwashing|personal protective equipment|ppe)\b",
+    r"\b(ventilator[- ]associated|vap|catheter[- ]associated|surgical site infection|ssi|hai|healthcare[- ]associated)\b",
+    r"\b(sterili[sz]ation|disinfection|disinfectant|isolation precautions|standard precautions|biomedical waste)\b",
+    r"\b(antimicrobial resistance|antimicrobial stewardship|amr)\b",
+]
+
+
+def _table_patterns(table_names: List[str]) -> List[str]:
+    """Matches each table name as written, or spelled with spaces when followed by "table"/"dataset"/"data"."""
+    patterns = []
+    for name in table_names:
+        escaped = re.escape(name.lower())
+        patterns.append(r"\b" + escaped + r"\b")
+        patterns.append(r"\b" + escaped.replace("_", " ") + r"\s+(table|dataset|data)\b")
+    return patterns
+
+
+# ---------- EMBEDDING PROTOTYPES ----------
+
+route_prototypes = {
+    "RAG": [
+        "What do the infection prevention and control guidelines recommend?",
+        "How should healthcare workers perform hand hygiene?",
+        "How to prevent ventilator-associated pneumonia in the ICU?",
+        "Guidelines for sterilization and disinfection of medical equipment",
+        "What are the standard precautions for infection control in hospitals?",
+        "How should biomedical waste be handled in a healthcare facility?",
+        "Measures to control antimicrobial resistance in hospitals",
+    ],
+    "SQL": [
+        "What is the average BMI of patients who had a stroke?",
+        "How many breast cancer patients are in stage IIIA?",
+        "Average survival months by breast cancer stage",
+        "Which countries have the highest cholera cases from water pollution?",
+        "How many lung cancer survey respondents smoke?",
+        "Compare glucose levels of stroke and non-stroke patients",
+    ],
+    "websearch": [
+        "What is the latest news on COVID-19 variants?",
+        "What is the weather in New York today?",
+        "Who won the football match yesterday?",
+        "What is the capital of Australia?",
+        "Recent research on Alzheimer's disease treatments",
+        "Tell me about the history of the Roman Empire",
+    ],
+    "chat": [
+        "Hello, how are you?",
+        "What is my name?",
+        "What is 22 times 8?",
+        "Write a Python function to reverse a string",
+        "Tell me a joke",
+        "Thanks for your help!",
+    ],
+}
+
+
+class PreRouter:
+    """
+    Zero-LLM router for the first supervisor hop of a query.
+
+    Keyword rules derived from the supervisor's decision guidelines and the SQL table names handle the
+    obvious cases. Otherwise the question is compared with per-route prototype questions (plus the table
+    descriptions from database_table_descriptions.csv) using the shared embedding model; the best route is
+    returned with its cosine similarity and its margin over the runner-up. The caller decides whether the
+    guess is confident enough to skip the supervisor LLM call.
+    """
+
+    def __init__(self, table_details_path: str) -> None:
+        tables = pd.read_csv(table_details_path)
+        self.keyword_rules = [
+            ("chat", [re.compile(p, re.IGNORECASE) for p in chat_patterns]),
+            ("SQL", [re.compile(p, re.IGNORECASE) for p in _table_patterns(tables["Table"].tolist())]),
+            ("RAG", [re.compile(p, re.IGNORECASE) for p in rag_patterns]),
+            ("websearch", [re.compile(p, re.IGNORECASE) for p in websearch_patterns]),
+        ]
+        self.prototypes: Dict[str, List[str]] = {route: list(texts) for route, texts in route_prototypes.items()}
+        self.prototypes["SQL"] += tables["Description"].tolist()
+
+        self._prototype_vectors: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def keyword_matches(self, question: str) -> List[str]:
+        """Routes whose keyword rules match the question, in rule order."""
+        return [route for route, patterns in self.keyword_rules if any(p.search(question) for p in patterns)]
+
+    def _get_prototype_vectors(self) -> Dict[str, np.ndarray]:
+        if self._prototype_vectors is None:
+            with self._lock:
+                if self._prototype_vectors is None:
+                    embeddings = get_embedding_model()
+                    vectors = {}
+                    for route, texts in self.prototypes.items():
+                        matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+                        vectors[route] = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+                    self._prototype_vectors = vectors
+        return self._prototype_vectors
+
+    def classify(self, question: str) -> Optional[RouteGuess]:
+        """
+        Local route guess for a question (None when nothing matches and the embedder is still loading).
+        """
+        matches = self.keyword_matches(question)
+        if len(matches) == 1:
+            return RouteGuess(matches[0], 1.0, "keyword")
+        if set(matches) == {"RAG", "SQL"} and tool_cfg.parallel_enabled:
+            # Guideline and dataset terms together: run both workers in parallel
+            return RouteGuess("RAG_SQL", 1.0, "keyword")
+
+        # Other rule combinations, or no rule at all: fall back to embeddings.
+        # Never load the embedding model on the request path; warm-up loads it in the background.
+        if not is_embedding_model_ready():
+            return None
+
+        query = np.asarray(get_embedding_model().embed_query(question), dtype=np.float32)
+        query /= np.linalg.norm(query)
+        scores = sorted(
+            ((float(np.max(vectors @ query)), route) for route, vectors in self._get_prototype_vectors().items()),
+            reverse=True,
+        )
+        (best_score, best_route), (second_score, _) = scores[0], scores[1]
+        return RouteGuess(best_route, best_score, "embedding", best_score - second_score)
+
+    def is_confident(self, guess: Optional[RouteGuess]) -> bool:
+        """Whether a guess clears the configured thresholds and can replace the supervisor LLM call."""
+        if guess is None:
+            return False
+        if guess.method == "keyword":
+            return True
+        return (guess.confidence >= tool_cfg.pre_router_similarity_threshold
+                and guess.margin >= tool_cfg.pre_router_margin_threshold)
+
+
+def record_pre_route(guess: RouteGuess) -> None:
+    routing_metrics["pre_routed"][guess.method] += 1
+
+
+def record_llm_route(guess: Optional[RouteGuess], llm_route: str) -> None:
+    """Logs how the local guess compares with the supervisor LLM's choice, for threshold tuning."""
+    routing_metrics["llm_routed"] += 1
+    if guess is None:
+        return
+    agreed = guess.route == llm_route
+    routing_metrics["agree" if agreed else "disagree"] += 1
+    bucket = routing_metrics["agreement_by_confidence"].setdefault(f"{guess.confidence:.1f}", [0, 0])
+    bucket[0] += int(agreed)
+    bucket[1] += 1
+    print(
+        f"🧭 Pre-router {'agreed' if agreed else 'disagreed'}: guess={guess.route} "
+        f"({guess.method}, confidence={guess.confidence:.2f}, margin={guess.margin:.2f}) LLM={llm_route}"
+    )
+
+
+pre_router = PreRouter(tool_cfg.table_details_path)
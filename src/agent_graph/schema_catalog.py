@@ -0,0 +1,158 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, List
+from configs.load_tools_config import LoadToolsConfig
+from src.sql_tuning.rollups import ROLLUP_PREFIX
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+NUMERIC_TYPES = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+
+def catalog_path(db_path: str) -> str:
+    """The catalog lives next to the database: sqldb/health_database.db -> sqldb/health_database.schema.json"""
+    return os.path.splitext(db_path)[0] + ".schema.json"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_schema_catalog(db_path: str) -> dict:
+    """
+    Introspects every table once: column names and types, row count, sample rows, the distinct values
+    of low-cardinality columns and the min/max of numeric columns.
+
+    Args:
+        db_path (str): Path to the SQLite database (opened read-only).
+
+    Returns:
+        dict: {"db_mtime": float, "tables": {table: {...}}}
+    """
+    mtime = os.path.getmtime(db_path)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = {}
+        # Rollup tables are an implementation detail of the SQL executor, not part of the prompt
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ) if not row[0].startswith(ROLLUP_PREFIX)]
+        for table in names:
+            qt = _quote(table)
+            columns = []
+            for _, column, col_type, *_ in conn.execute(f"PRAGMA table_info({qt})"):
+                qc = _quote(column)
+                info = {"name": column, "type": col_type or ""}
+                n_distinct = conn.execute(f"SELECT COUNT(DISTINCT {qc}) FROM {qt}").fetchone()[0]
+                info["distinct"] = n_distinct
+                if n_distinct <= tool_cfg.schema_catalog_max_distinct:
+                    info["values"] = [row[0] for row in conn.execute(
+                        f"SELECT DISTINCT {qc} FROM {qt} WHERE {qc} IS NOT NULL ORDER BY {qc}"
+                    )]
+                elif info["type"].upper().startswith(NUMERIC_TYPES):
+                    info["min"], info["max"] = conn.execute(f"SELECT MIN({qc}), MAX({qc}) FROM {qt}").fetchone()
+                columns.append(info)
+
+            tables[table] = {
+                "row_count": conn.execute(f"SELECT COUNT(*) FROM {qt}").fetchone()[0],
+                "columns": columns,
+                "sample_rows": [list(row) for row in conn.execute(
+                    f"SELECT * FROM {qt} LIMIT {tool_cfg.schema_catalog_sample_rows}"
+                )],
+            }
+    finally:
+        conn.close()
+    return {"db_mtime": mtime, "tables": tables}
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def _format_literal(value) -> str:
+    """SQL literal as it must appear in a WHERE clause (strings quoted, so trailing spaces stay visible)."""
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return _format_value(value)
+
+
+def render_table(table: str, entry: dict) -> str:
+    """Compact prompt text for one table: quoted columns with types/values/ranges and sample rows."""
+    lines = [f"Table {_quote(table)} ({entry['row_count']} rows)", "Columns:"]
+    for column in entry["columns"]:
+        line = f"- {_quote(column['name'])} {column['type']}"
+        if "values" in column:
+            line += ": one of " + ", ".join(_format_literal(v) for v in column["values"])
+        elif "min" in column and column["min"] is not None:
+            line += f": range {_format_value(column['min'])} to {_format_value(column['max'])}"
+        lines.append(line)
+    if entry["sample_rows"]:
+        lines.append(f"{len(entry['sample_rows'])} sample rows:")
+        lines.append(" | ".join(column["name"] for column in entry["columns"]))
+        lines.extend(" | ".join(_format_value(v) for v in row) for row in entry["sample_rows"])
+    return "\n".join(lines)
+
+
+class SchemaCatalog:
+    """
+    Schema catalog of the health database, persisted as JSON next to the DB and keyed by its mtime.
+
+    The catalog is built (or loaded from disk) once per database version and the rendered per-table
+    prompt text is served from memory, so SQL generation runs no introspection or sample-row queries.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self.path = catalog_path(db_path)
+        self._catalog = None
+        self._rendered: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _load_or_build(self, mtime: float) -> dict:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                catalog = json.load(f)
+            if catalog.get("db_mtime") == mtime:
+                return catalog
+
+        print("🗂️ Building SQL schema catalog")
+        catalog = build_schema_catalog(self.db_path)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(catalog, f, default=str)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not persist the schema catalog ({e}); keeping it in memory")
+        return catalog
+
+    def refresh(self) -> None:
+        """Reloads the catalog if the database file changed since it was built."""
+        mtime = os.path.getmtime(self.db_path)
+        if self._catalog is not None and self._catalog["db_mtime"] == mtime:
+            return
+        with self._lock:
+            if self._catalog is None or self._catalog["db_mtime"] != mtime:
+                self._catalog = self._load_or_build(mtime)
+                self._rendered = {
+                    table: render_table(table, entry) for table, entry in self._catalog["tables"].items()
+                }
+
+    @property
+    def tables(self) -> List[str]:
+        self.refresh()
+        return list(self._rendered)
+
+    def table_info(self, tables: List[str] = None) -> str:
+        """Rendered schema text for the given tables (default: all), unknown names ignored."""
+        self.refresh()
+        names = self._rendered if tables is None else [t for t in tables if t in self._rendered]
+        return "\n\n".join(self._rendered[t] for t in names)
+
+
+schema_catalog = SchemaCatalog(tool_cfg.sql_db_path)
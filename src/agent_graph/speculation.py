@@ -0,0 +1,74 @@
+import time
+import asyncio
+from typing import Awaitable, Optional
+from configs.load_tools_config import LoadToolsConfig
+from src.agent_graph.pre_router import RouteGuess
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# Running counters exposed through /metrics
+speculation_metrics = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "hit_rate": 0.0,
+    "latency_saved_seconds": 0.0,   # worker time overlapped with the supervisor LLM call on hits
+    "wasted_seconds": 0.0,          # worker time spent on cancelled guesses
+    "by_worker": {},                # worker -> {"hits": n, "misses": n}
+}
+
+
+def can_speculate(guess: Optional[RouteGuess]) -> bool:
+    """Whether the local route guess is good enough to start its worker before the supervisor decides."""
+    return (
+        tool_cfg.speculation_enabled
+        and guess is not None
+        and guess.route in tool_cfg.speculation_allowed_workers
+        and guess.confidence >= tool_cfg.speculation_min_confidence
+    )
+
+
+def _record(worker: str, hit: bool, seconds: float) -> None:
+    speculation_metrics["hits" if hit else "misses"] += 1
+    speculation_metrics["latency_saved_seconds" if hit else "wasted_seconds"] += seconds
+    decided = speculation_metrics["hits"] + speculation_metrics["misses"]
+    speculation_metrics["hit_rate"] = speculation_metrics["hits"] / decided
+    counters = speculation_metrics["by_worker"].setdefault(worker, {"hits": 0, "misses": 0})
+    counters["hits" if hit else "misses"] += 1
+
+
+class SpeculativeRun:
+    """
+    A worker started on the pre-router's guess while the supervisor LLM call is still running.
+
+    If the supervisor picks the same worker, result() returns its answer and the time it ran alongside
+    the supervisor call is counted as latency saved. Otherwise cancel() stops it and its run time so far
+    is counted as wasted.
+    """
+
+    def __init__(self, worker: str, run: Awaitable[str]) -> None:
+        self.worker = worker
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.task = asyncio.create_task(self._timed(run))
+        speculation_metrics["started"] += 1
+
+    async def _timed(self, run: Awaitable[str]) -> str:
+        try:
+            return await run
+        finally:
+            self.finished = time.perf_counter()
+
+    async def result(self) -> str:
+        """Awaits the worker's answer once the supervisor has agreed with the guess."""
+        decided = time.perf_counter()
+        try:
+            return await self.task
+        finally:
+            _record(self.worker, True, min(decided, self.finished or decided) - self.started)
+
+    def cancel(self) -> None:
+        """Stops the worker after the supervisor chose a different route."""
+        self.task.cancel()
+        _record(self.worker, False, (self.finished or time.perf_counter()) - self.started)
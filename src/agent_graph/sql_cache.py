@@ -0,0 +1,199 @@
+import os
+import re
+import time
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from configs.load_tools_config import LoadToolsConfig
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+
+def normalize_question(question: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the SQL a question needs."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.! ").lower()
+
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace-insensitive SQL key (case is kept: string literals are case-sensitive)."""
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+class LRUCache:
+    """Size-bounded mapping that evicts the least recently used entry first."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value) -> list:
+        """Stores a value and returns the keys evicted to make room."""
+        self._items[key] = value
+        self._items.move_to_end(key)
+        evicted = []
+        while len(self._items) > self.max_entries:
+            evicted.append(self._items.popitem(last=False)[0])
+        return evicted
+
+    def pop(self, key) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SQLCache:
+    """
+    Two-level cache for the SQL tool.
+
+    Level 1 maps a normalized question and model name to the generated SQL, saving the SQL-generation
+    LLM call(s). Level 2 maps normalized SQL text to its result, saving the table scans; it is cleared
+    whenever the database file's mtime changes. Both levels are LRU-bounded and, when persist_path is
+    set, written through to a small SQLite file so they survive restarts. Those writes are queued to a
+    background thread (one commit per drained batch), so a cache miss never waits on disk I/O.
+    """
+
+    def __init__(self, max_questions: int, max_results: int, persist_path: Optional[str] = None) -> None:
+        self.questions = LRUCache(max_questions)
+        self.results = LRUCache(max_results)
+        self.db_mtime = None
+        self._lock = threading.Lock()
+        self._store = None
+        self._writes = queue.Queue()
+        if persist_path:
+            try:
+                self._open_store(persist_path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ SQL cache persistence disabled ({e}); caching in memory only")
+                self._store = None
+        if self._store is not None:
+            threading.Thread(target=self._writer, name="sql-cache-writer", daemon=True).start()
+
+    # ---------- persistence ----------
+
+    def _open_store(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._store = sqlite3.connect(path, check_same_thread=False)
+        self._store.executescript("""
+            CREATE TABLE IF NOT EXISTS question_sql (key TEXT, model TEXT, sql TEXT, last_used REAL, PRIMARY KEY (key, model));
+            CREATE TABLE IF NOT EXISTS sql_result (key TEXT PRIMARY KEY, db_mtime REAL, result TEXT, last_used REAL);
+        """)
+        # Reload the most recently used entries, oldest first so LRU order is preserved
+        for key, model, sql in self._store.execute(
+            "SELECT key, model, sql FROM (SELECT * FROM question_sql ORDER BY last_used DESC LIMIT ?) ORDER BY last_used",
+            (self.questions.max_entries,),
+        ):
+            self.questions.put((key, model), sql)
+        for key, db_mtime, result in self._store.execute(
+            "SELECT key, db_mtime, result FROM (SELECT * FROM sql_result ORDER BY last_used DESC LIMIT ?) ORDER BY last_used",
+            (self.results.max_entries,),
+        ):
+            self.results.put(key, (db_mtime, result))
+
+    def _write(self, statement: str, params: tuple) -> None:
+        if self._store is not None:
+            self._writes.put((statement, params))
+
+    def _writer(self) -> None:
+        """Applies queued writes in order, committing once per batch of whatever is waiting."""
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for statement, params in batch:
+                    self._store.execute(statement, params)
+                self._store.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ SQL cache persistence error: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def flush(self) -> None:
+        """Blocks until every queued write has been committed."""
+        self._writes.join()
+
+    # ---------- level 1: question -> SQL ----------
+
+    def get_sql(self, question: str, model_name: str) -> Optional[str]:
+        with self._lock:
+            return self.questions.get((normalize_question(question), model_name))
+
+    def put_sql(self, question: str, model_name: str, sql: str) -> None:
+        key = normalize_question(question)
+        with self._lock:
+            for old_key, old_model in self.questions.put((key, model_name), sql):
+                self._write("DELETE FROM question_sql WHERE key = ? AND model = ?", (old_key, old_model))
+            self._write("INSERT OR REPLACE INTO question_sql VALUES (?, ?, ?, ?)", (key, model_name, sql, time.time()))
+
+    def forget_sql(self, question: str, model_name: str) -> None:
+        """Drops a cached question whose SQL failed, so the next ask regenerates it."""
+        key = normalize_question(question)
+        with self._lock:
+            self.questions.pop((key, model_name))
+            self._write("DELETE FROM question_sql WHERE key = ? AND model = ?", (key, model_name))
+
+    # ---------- level 2: SQL -> result ----------
+
+    def _check_db_version(self, db_mtime: float) -> None:
+        if db_mtime != self.db_mtime:
+            if self.db_mtime is not None:
+                self.results.clear()
+            self.db_mtime = db_mtime
+            self._write("DELETE FROM sql_result WHERE db_mtime != ?", (db_mtime,))
+
+    def get_result(self, sql: str, db_mtime: float) -> Optional[str]:
+        with self._lock:
+            self._check_db_version(db_mtime)
+            entry = self.results.get(normalize_sql(sql))
+            if entry is None:
+                return None
+            if entry[0] != db_mtime:
+                # persisted before the database changed
+                self.results.pop(normalize_sql(sql))
+                return None
+            return entry[1]
+
+    def put_result(self, sql: str, db_mtime: float, result: str) -> None:
+        key = normalize_sql(sql)
+        with self._lock:
+            self._check_db_version(db_mtime)
+            for old_key in self.results.put(key, (db_mtime, result)):
+                self._write("DELETE FROM sql_result WHERE key = ?", (old_key,))
+            self._write("INSERT OR REPLACE INTO sql_result VALUES (?, ?, ?, ?)", (key, db_mtime, result, time.time()))
+
+    # ---------- metrics ----------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                level: {"entries": len(cache), "max_entries": cache.max_entries, "hits": cache.hits, "misses": cache.misses}
+                for level, cache in (("question_to_sql", self.questions), ("sql_to_result", self.results))
+            }
+
+
+sql_cache = SQLCache(
+    max_questions=tool_cfg.sql_cache_max_questions,
+    max_results=tool_cfg.sql_cache_max_results,
+    persist_path=tool_cfg.sql_cache_persist_path if tool_cfg.sql_cache_enabled else None,
+)
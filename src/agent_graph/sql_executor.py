@@ -0,0 +1,151 @@
+import os
+import time
+import queue
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+from configs.load_tools_config import LoadToolsConfig
+from src.sql_tuning.query_log import QueryLog, open_query_log
+from src.sql_tuning.rollups import RollupRewriter
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# SQLite calls the progress handler every this many virtual machine instructions
+PROGRESS_HANDLER_STEPS = 10_000
+
+
+class QueryResult(NamedTuple):
+    text: str          # what the agent sees: columns and rows, an error, or a truncation marker
+    rows: int          # rows returned (after the row cap)
+    truncated: bool
+    error: bool        # failed or timed out (never cached)
+    seconds: float     # wall-clock execution time
+
+
+class ReadOnlySQLExecutor:
+    """
+    Executes LLM-generated SQL against the health database safely.
+
+    Statements run concurrently on a thread pool, each on a connection from a pool of read-only
+    (mode=ro, query_only) SQLite connections. A progress handler interrupts any statement that runs past
+    its wall-clock deadline, and results are capped in rows and bytes with a truncation marker so one
+    bad query cannot pin a worker or flood the LLM context.
+
+    Optionally, aggregate statements are rewritten to the advisor's rollup tables before they run, and
+    every execution is appended to the query log that the offline tuning tools analyse.
+    """
+
+    def __init__(self, db_path: str, pool_size: int, timeout_seconds: float, max_rows: int, max_bytes: int,
+                 query_log: Optional[QueryLog] = None, rewriter: Optional[RollupRewriter] = None) -> None:
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.query_log = query_log
+        self.rewriter = rewriter
+        self._threads = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sql")
+        self._connections = queue.Queue()  # (db mtime when opened, connection)
+        self._db_mtime = None
+        self._lock = threading.Lock()
+
+    # ---------- connection pool ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _check_db_version(self) -> None:
+        """Drops pooled connections when the database file is replaced, so queries see the new file."""
+        mtime = os.path.getmtime(self.db_path)
+        if mtime == self._db_mtime:
+            return
+        with self._lock:
+            if mtime != self._db_mtime:
+                while not self._connections.empty():
+                    self._connections.get_nowait()[1].close()
+                for _ in range(self.pool_size):
+                    self._connections.put((mtime, self._connect()))
+                self._db_mtime = mtime
+
+    # ---------- execution ----------
+
+    def _format(self, columns: List[str], rows: list, more_rows: bool) -> QueryResult:
+        header = "Columns: " + ", ".join(columns)
+        lines, size, truncated = [header], len(header), more_rows
+        for row in rows:
+            line = str(tuple(row))
+            if size + len(line) + 1 > self.max_bytes:
+                truncated = True
+                break
+            lines.append(line)
+            size += len(line) + 1
+        shown = len(lines) - 1
+        if truncated:
+            lines.append(f"[truncated: showing the first {shown} rows; more rows matched. "
+                         f"Use aggregation or a LIMIT to narrow the query]")
+        return QueryResult("\n".join(lines), shown, truncated, False, 0.0)
+
+    def _execute(self, sql: str) -> QueryResult:
+        executed = self.rewriter.rewrite(sql) if self.rewriter else sql
+        result = self._run(executed)
+        if result.error and executed != sql:
+            executed = sql  # a rollup that cannot answer it must never cost the agent its answer
+            result = self._run(sql)
+        if self.query_log is not None:
+            self.query_log.record(sql, executed, result.seconds, result.rows, result.error)
+        return result
+
+    def _run(self, sql: str) -> QueryResult:
+        conn_mtime, conn = self._connections.get()
+        started = time.monotonic()
+        deadline = started + self.timeout_seconds
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_STEPS)
+        try:
+            cursor = conn.execute(sql)
+            columns = [c[0] for c in cursor.description or []]
+            rows = cursor.fetchmany(self.max_rows + 1)
+            result = self._format(columns, rows[:self.max_rows], len(rows) > self.max_rows)
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > deadline:
+                text = f"Error: query interrupted after {self.timeout_seconds:g}s. Simplify it or add filters."
+            else:
+                text = f"Error: {e}"
+            result = QueryResult(text, 0, False, True, 0.0)
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            result = QueryResult(f"Error: {e}", 0, False, True, 0.0)
+        finally:
+            conn.set_progress_handler(None, 0)
+            if conn_mtime == self._db_mtime:
+                self._connections.put((conn_mtime, conn))
+            else:
+                conn.close()  # opened on a replaced database file
+        return result._replace(seconds=time.monotonic() - started)
+
+    def submit(self, sql: str) -> Future:
+        self._check_db_version()
+        return self._threads.submit(self._execute, sql)
+
+    def run_all(self, queries: List[str]) -> List[QueryResult]:
+        """Runs independent statements concurrently and returns their results in order."""
+        futures = [self.submit(q) for q in queries]
+        return [f.result() for f in futures]
+
+    async def arun_all(self, queries: List[str]) -> List[QueryResult]:
+        """Async variant of run_all()."""
+        return await asyncio.gather(*(asyncio.wrap_future(self.submit(q)) for q in queries))
+
+
+sql_executor = ReadOnlySQLExecutor(
+    tool_cfg.sql_db_path,
+    pool_size=tool_cfg.sql_executor_pool_size,
+    timeout_seconds=tool_cfg.sql_executor_timeout_seconds,
+    max_rows=tool_cfg.sql_executor_max_rows,
+    max_bytes=tool_cfg.sql_executor_max_bytes,
+    query_log=open_query_log(tool_cfg.sql_query_log_path, tool_cfg.sql_query_log_max_rows),
+    rewriter=RollupRewriter(tool_cfg.sql_db_path) if tool_cfg.sql_rewrite_to_rollups else None,
+)
@@ -1,19 +1,24 @@
+import os
+import re
+import asyncio
+import threading
+import numpy as np
 import pandas as pd
 from typing import List, Callable
 from operator import itemgetter
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import PromptTemplate#, ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain_core.prompts import PromptTemplate, ChatPromptTemplate#, SystemMessagePromptTemplate, HumanMessagePromptTemplate
 from pydantic import BaseModel, Field
 
 
-from langchain_community.utilities import SQLDatabase
-from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
 from langchain.chains.openai_tools import create_extraction_chain_pydantic
-from langchain.chains import create_sql_query_chain
 from langchain.tools import tool
 from configs.load_tools_config import LoadToolsConfig
-from src.utility import get_llm
+from src.utility import get_llm, get_embedding_model, is_embedding_model_ready
+from src.agent_graph.schema_catalog import schema_catalog
+from src.agent_graph.sql_cache import sql_cache
+from src.agent_graph.sql_executor import sql_executor
 
 # Load config
 tool_cfg = LoadToolsConfig()
@@ -23,23 +28,94 @@ class Table(BaseModel):
     name: str = Field(description="Name of table in SQL database.")
 
 
+class SQLPlan(BaseModel):
+    """Tables relevant to the user question and the read-only SQL that answers it."""
+    tables: List[str] = Field(description="Names of the SQL tables the query uses.")
+    query: str = Field(description="SQLite query statement(s) answering the question, separated by semicolons.")
+
+
+sql_plan_prompt = """You are a SQL assistant. Your task is to generate **safe, read-only SQLite queries** only.
+
+Tables available:
+
+{table_details}
+Schema and sample rows:
+
+{table_info}
+
+The user wants at most {top_k} results.
+
+Constraints:
+- Pick the tables the question needs and write the query (or several, separated by semicolons) in one step.
+- Do NOT use INSERT, UPDATE, DELETE, DROP, or any other data-modifying operations.
+- Do NOT combine aggregation and non-aggregation in a single query without proper GROUP BY.
+- Quote column names that contain spaces or special characters with double quotes.
+- Do NOT include code block markers or explanations in the query."""
+
+
+class LocalTableSelector:
+    """
+    Picks the tables relevant to a question without an LLM call, from database_table_descriptions.csv.
+
+    Tables are scored by cosine similarity between the question and "name: description" using the shared
+    embedding model (when it is loaded), plus a keyword bonus for words shared with the table name or
+    description.
+    """
+
+    def __init__(self, table_details_path: str) -> None:
+        df = pd.read_csv(table_details_path)
+        self.tables = df["Table"].tolist()
+        self.documents = [f"{row['Table'].replace('_', ' ')}: {row['Description']}" for _, row in df.iterrows()]
+        self.keywords = [set(self._words(document)) for document in self.documents]
+        self._vectors = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return [w for w in re.findall(r"[a-z]+", text.lower().replace("_", " ")) if len(w) > 3]
+
+    def _get_vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            with self._lock:
+                if self._vectors is None:
+                    matrix = np.asarray(get_embedding_model().embed_documents(self.documents), dtype=np.float32)
+                    self._vectors = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        return self._vectors
+
+    def select(self, question: str, top_k: int) -> List[str]:
+        """The top_k most relevant table names (all tables when nothing matches)."""
+        words = set(self._words(question))
+        scores = np.array([len(words & keywords) / 5.0 for keywords in self.keywords], dtype=np.float32)
+        if is_embedding_model_ready():
+            query = np.asarray(get_embedding_model().embed_query(question), dtype=np.float32)
+            scores += self._get_vectors() @ (query / np.linalg.norm(query))
+        if not scores.any():
+            return list(self.tables)
+        return [self.tables[i] for i in np.argsort(-scores)[:top_k]]
+
+
 class HealthSQLAgent:
     """
     A specialized SQL agent that interacts with the Health SQL database using an LLM.
 
     Attributes:
         sql_agent_llm (ChatOpenAI/ChatGroq): The language model used.
-        db (SQLDatabase): The connected SQL database.
+        sqldb_directory (str): Path of the SQLite database (queries run on the shared read-only executor).
         full_chain (Runnable): The complete pipeline from question to answer.
+        context_chain (Runnable): The pipeline from question to the executed queries and their raw rows.
     """
 
-    def __init__(self, sqldb_directory: str, llm, table_details_path: str) -> None:
+    def __init__(self, sqldb_directory: str, llm, table_details_path: str,
+                 table_details: str = None,
+                 table_selector: LocalTableSelector = None, model_name: str = "") -> None:
         # LLM
         self.sql_agent_llm = llm
+        self.model_name = model_name  # part of the question -> SQL cache key
+        self.sqldb_directory = sqldb_directory
 
-        self.db = SQLDatabase.from_uri(f"sqlite:///{sqldb_directory}")
-
-        self.table_details = self._get_table_details(table_details_path)
+        # Reuse already parsed table details when given
+        self.table_details = table_details or self._get_table_details(table_details_path)
+        self.table_selector = table_selector or LocalTableSelector(table_details_path)
 
         # Step 1: Table extraction setup
         table_details_prompt = f"""Return the names of ALL the SQL tables that MIGHT be relevant to the user question. 
@@ -107,15 +183,21 @@ class HealthSQLAgent:
         """
         )
 
-        self.generate_query = create_sql_query_chain(
-            self.sql_agent_llm, self.db, prompt=sql_db_query_prompt
+        # Schema text comes from the cached schema catalog, so no introspection queries run per question
+        self.generate_query = (
+            {
+                "input": itemgetter("question"),
+                "top_k": itemgetter("top_k"),
+                "table_info": lambda x: schema_catalog.table_info(x["table_names_to_use"]),
+            }
+            | sql_db_query_prompt
+            | self.sql_agent_llm
+            | StrOutputParser()
+            | self._strip_sql
         )
 
-        # Step 3: Query execution
-        self.execute_query_tool = QuerySQLDatabaseTool(db=self.db)
-        self.multi_query_runner = RunnableLambda(
-            lambda x: self._execute_multiple_sql_queries(x["query"], self.execute_query_tool)
-        )
+        # Step 3: Query execution (read-only, concurrent, time- and size-bounded)
+        self.multi_query_runner = RunnableLambda(self._run_queries, afunc=self._arun_queries)
 
         # Step 4: Answer rephrasing
         answer_prompt = PromptTemplate.from_template(
@@ -129,15 +211,32 @@ class HealthSQLAgent:
 
         self.rephrase_answer = answer_prompt | self.sql_agent_llm | StrOutputParser()
 
+        # Single-call planning: one structured-output call returns the tables and the SQL together
+        plan_prompt = ChatPromptTemplate.from_messages([("system", sql_plan_prompt), ("human", "{question}")])
+        self.plan_query = (
+            RunnableLambda(self._plan_inputs)
+            | plan_prompt
+            | self.sql_agent_llm.with_structured_output(SQLPlan)
+        )
+
         # Step 5: Combine into a chain
-        self.full_chain = (
-            RunnablePassthrough.assign(table_names_to_use=self.select_table)
-            | RunnablePassthrough.assign(query=self.generate_query)
+        if tool_cfg.sql_planning_mode == "single_call":
+            self.question_to_sql = self.plan_query | RunnableLambda(lambda plan: plan.query)
+        else:
+            self.question_to_sql = RunnablePassthrough.assign(table_names_to_use=self.select_table) | self.generate_query
+
+        # Repeated questions reuse their SQL (level 1 of the SQL cache) instead of regenerating it
+        query_and_result = (
+            RunnablePassthrough.assign(query=RunnableLambda(self._cached_sql, afunc=self._acached_sql))
             .assign(result=self.multi_query_runner)
-            | self.rephrase_answer
         )
+        self.full_chain = query_and_result | self.rephrase_answer
 
-    def _get_table_details(self, csv_path: str) -> str:
+        # Context-only variant: skip the rephrasing LLM call, the worker agent answers from the rows
+        self.context_chain = query_and_result | RunnableLambda(self._format_context)
+
+    @staticmethod
+    def _get_table_details(csv_path: str) -> str:
         """Reads CSV file and formats table name and description into a string."""
         df = pd.read_csv(csv_path)
         #df = pd.read_csv("database_table_descriptions.csv")
@@ -146,23 +245,153 @@ class HealthSQLAgent:
             table_details += f"Table Name: {row['Table']}\nTable Description: {row['Description']}\n\n"
         return table_details
 
+    @staticmethod
+    def _strip_sql(text: str) -> str:
+        """Removes code fences and a leading "SQLQuery:" label the LLM may add despite the prompt."""
+        text = re.sub(r"```(sqlite|sql)?", "", text).strip()
+        return re.sub(r"^SQLQuery:\s*", "", text, flags=re.IGNORECASE)
+
+    def _plan_inputs(self, x: dict) -> dict:
+        """
+        Prompt inputs for the planning call: the full schema from the catalog, or only the locally
+        selected tables' schemas when the full one exceeds sql_plan_max_schema_chars.
+        """
+        table_info = schema_catalog.table_info()
+        if len(table_info) > tool_cfg.sql_plan_max_schema_chars:
+            tables = self.table_selector.select(x["question"], tool_cfg.sql_plan_local_tables)
+            table_info = schema_catalog.table_info(tables)
+        return {
+            "question": x["question"],
+            "top_k": x["top_k"],
+            "table_details": self.table_details,
+            "table_info": table_info,
+        }
+
     def _get_tables(self, tables: List[Table]) -> List[str]:
         """Extracts table names from Table model."""
         return [table.name for table in tables]
 
-    def _execute_multiple_sql_queries(self, sql_code: str, db_tool) -> List:
-        """Splits and executes multiple SQL queries."""
-        queries = [q.strip() for q in sql_code.split(";") if q.strip()]        
-        return [db_tool.invoke(q) for q in queries]
+    @staticmethod
+    def _split_queries(sql_code: str) -> List[str]:
+        return [q.strip() for q in sql_code.split(";") if q.strip()]
+
+    def _cached_sql(self, x: dict) -> str:
+        """Generated SQL for the question, served from the question -> SQL cache when possible."""
+        if not tool_cfg.sql_cache_enabled:
+            return self.question_to_sql.invoke(x)
+        sql = sql_cache.get_sql(x["question"], self.model_name)
+        if sql is None:
+            sql = self.question_to_sql.invoke(x)
+            sql_cache.put_sql(x["question"], self.model_name, sql)
+        return sql
+
+    async def _acached_sql(self, x: dict) -> str:
+        """Async variant of _cached_sql()."""
+        if not tool_cfg.sql_cache_enabled:
+            return await self.question_to_sql.ainvoke(x)
+        sql = sql_cache.get_sql(x["question"], self.model_name)
+        if sql is None:
+            sql = await self.question_to_sql.ainvoke(x)
+            sql_cache.put_sql(x["question"], self.model_name, sql)
+        return sql
+
+    def _cached_results(self, queries: List[str]) -> tuple:
+        """Results already in the SQL -> result cache (None where missing) and the DB version they belong to."""
+        db_mtime = os.path.getmtime(self.sqldb_directory)
+        if not tool_cfg.sql_cache_enabled:
+            return [None] * len(queries), db_mtime
+        return [sql_cache.get_result(q, db_mtime) for q in queries], db_mtime
+
+    def _merge_results(self, x: dict, queries: List[str], cached: List, executed: List, db_mtime: float) -> List[str]:
+        """Fills the cache misses with the executed results, caching successful ones."""
+        executed = iter(executed)
+        results = []
+        for query, result in zip(queries, cached):
+            if result is None:
+                run = next(executed)
+                result = run.text
+                if tool_cfg.sql_cache_enabled and not run.error:
+                    sql_cache.put_result(query, db_mtime, result)
+            results.append(result)
+        if tool_cfg.sql_cache_enabled and any(r.startswith("Error") for r in results):
+            # Don't keep serving SQL that failed for this question
+            sql_cache.forget_sql(x["question"], self.model_name)
+        return results
+
+    def _run_queries(self, x: dict) -> List[str]:
+        """Splits the SQL and runs the statements not served from the cache concurrently."""
+        queries = self._split_queries(x["query"])
+        cached, db_mtime = self._cached_results(queries)
+        executed = sql_executor.run_all([q for q, r in zip(queries, cached) if r is None])
+        return self._merge_results(x, queries, cached, executed, db_mtime)
+
+    async def _arun_queries(self, x: dict) -> List[str]:
+        """Async variant of _run_queries()."""
+        queries = self._split_queries(x["query"])
+        cached, db_mtime = self._cached_results(queries)
+        executed = await sql_executor.arun_all([q for q, r in zip(queries, cached) if r is None])
+        return self._merge_results(x, queries, cached, executed, db_mtime)
+
+    def _format_context(self, x: dict) -> str:
+        """Compact tool output: each executed SQL query followed by its rows."""
+        return "\n\n".join(
+            f"SQL Query: {query}\nSQL Result: {result}"
+            for query, result in zip(self._split_queries(x["query"]), x["result"])
+        )
+
+    def _chain(self):
+        return self.context_chain if tool_cfg.tool_output_mode == "context" else self.full_chain
 
     def run(self, question: str, top_k: int = 5) -> str:
-        """Executes the full chain on a user question."""
-        return self.full_chain.invoke({"question": question, "top_k": top_k, "table_info": self.table_details})
+        """Executes the chain for the configured tool output mode (rows or answer) on a user question."""
+        return self._chain().invoke({"question": question, "top_k": top_k, "table_info": self.table_details})
+
+    async def arun(self, question: str, top_k: int = 5) -> str:
+        """Async variant of run()."""
+        return await self._chain().ainvoke({"question": question, "top_k": top_k, "table_info": self.table_details})
+
+## Long-lived agents
+# model_name -> HealthSQLAgent; all agents share the parsed table details and the table selector
+# (queries run on sql_executor's connection pool). Rebuilt when the DB file's mtime changes.
+_sql_agents = {}
+_shared_table_details = None
+_shared_table_selector = None
+_db_mtime = None
+_sql_agents_lock = threading.Lock()
+
+def get_health_sql_agent(model_name: str) -> HealthSQLAgent:
+    """Returns the cached HealthSQLAgent for a model, rebuilding all agents if the DB file changed."""
+    global _shared_table_details, _shared_table_selector, _db_mtime
+
+    mtime = os.path.getmtime(tool_cfg.sql_db_path)
+    with _sql_agents_lock:
+        if mtime != _db_mtime:
+            _sql_agents.clear()
+            _shared_table_details = HealthSQLAgent._get_table_details(tool_cfg.table_details_path)
+            schema_catalog.refresh()
+            if _shared_table_selector is None:
+                _shared_table_selector = LocalTableSelector(tool_cfg.table_details_path)
+            _db_mtime = mtime
+
+        if model_name not in _sql_agents:
+            _sql_agents[model_name] = HealthSQLAgent(
+                sqldb_directory=tool_cfg.sql_db_path,
+                llm=get_llm(model_name),
+                table_details_path=tool_cfg.table_details_path,
+                table_details=_shared_table_details,
+                table_selector=_shared_table_selector,
+                model_name=model_name,
+            )
+        return _sql_agents[model_name]
+
+def warm_sql_resources() -> None:
+    """Builds (or loads) the schema catalog ahead of the first SQL question."""
+    schema_catalog.refresh()
 
 ## Final LangChain Tool wrapper
 def query_health_sqldb(model_name: str) -> Callable:
     @tool
-    def ask_health_sql(question: str) -> str:
+    async def ask_health_sql(question: str) -> str:
         """
         Query the Health SQL Database using natural language.
 
@@ -188,20 +417,15 @@ def query_health_sqldb(model_name: str) -> Callable:
                         Example: "What factors most influence stroke risk in patients under 50?"
 
         Returns:
-            str: A human-readable answer generated by executing the SQL query on the database.
+            str: The executed SQL queries with their result rows, or a human-readable answer
+                in "answer" tool output mode.
         """
         try:
-            # Initialize LLM based on model name
-            llm = get_llm(model_name)
-            # Initialize the SQL agent with config
-            agent = HealthSQLAgent(
-                sqldb_directory=tool_cfg.sql_db_path,
-                llm=llm,
-                table_details_path=tool_cfg.table_details_path,
-            )
+            # Reuse the long-lived SQL agent for this model (a rebuild reflects the DB, so off the event loop)
+            agent = await asyncio.to_thread(get_health_sql_agent, model_name)
 
-            # Run the full question → SQL → execution → final answer pipeline
-            return agent.run(question)
+            # Run the question → SQL → execution pipeline (→ final answer in "answer" mode)
+            return await agent.arun(question)
         except Exception as e:
             return f"Error querying SQL health database: {str(e)}"
     return ask_health_sql
\ No newline at end of file
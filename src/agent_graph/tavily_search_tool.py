@@ -1,3 +1,10 @@
+import re
+import time
+import asyncio
+import httpx
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.tools import tool
 from configs.load_tools_config import LoadToolsConfig
@@ -5,15 +12,162 @@ from configs.load_tools_config import LoadToolsConfig
 # Load configuration
 tool_cfg = LoadToolsConfig()
 
-# Use the built-in Tavily search tool from LangChain
-search_tool = TavilySearchResults(api_key=tool_cfg.tavily_api_key)
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change what a web search returns."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.! ").lower()
+
+
+# ---------- search backends ----------
+
+class SearchBackend(ABC):
+    """Upstream web search. Returns results as [{"title", "url", "content"}, ...]."""
+
+    @abstractmethod
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        ...
+
+
+class LangChainTavilyBackend(SearchBackend):
+    """The built-in Tavily search tool from LangChain."""
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self._tools = {}
+
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        if max_results not in self._tools:
+            self._tools[max_results] = TavilySearchResults(api_key=self.api_key, max_results=max_results)
+        results = await self._tools[max_results].ainvoke({"query": query})
+        if isinstance(results, str):
+            raise RuntimeError(results)  # the tool reports API errors as a string
+        return results or []
+
+
+class TavilyHTTPBackend(SearchBackend):
+    """
+    Tavily REST API (POST {base_url}/search) over a pooled httpx client.
+
+    Point base_url at a local server implementing the same endpoint to test without API credits.
+    """
+
+    def __init__(self, base_url: str, api_key: str, timeout_seconds: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout_seconds = timeout_seconds
+        self._clients = {}  # event loop -> AsyncClient (clients cannot be shared across loops)
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients = {l: c for l, c in self._clients.items() if not l.is_closed()}
+            self._clients[loop] = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_seconds)
+        return self._clients[loop]
+
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        response = await self._client().post(
+            "/search", json={"api_key": self.api_key, "query": query, "max_results": max_results}
+        )
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+
+# ---------- result cache ----------
+
+class SearchResultCache:
+    """
+    TTL- and size-bounded cache in front of a search backend, with single-flight coalescing.
+
+    Results are keyed by the normalized query and max_results. Concurrent identical searches await one
+    shared upstream call; that call runs as its own task, so a caller being cancelled (e.g. a discarded
+    speculative run) does not cancel it for the others. Failed searches are not cached.
+    """
+
+    def __init__(self, backend: SearchBackend, ttl_seconds: float, max_entries: int) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (expires_at, results)
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get(self, key: tuple) -> Optional[List[dict]]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return item[1]
+
+    def _put(self, key: tuple, results: List[dict]) -> None:
+        self._items[key] = (time.monotonic() + self.ttl_seconds, results)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    async def _fetch(self, key: tuple, query: str, max_results: int) -> List[dict]:
+        try:
+            results = await self.backend.search(query, max_results)
+            if self.ttl_seconds > 0:
+                self._put(key, results)
+            return results
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        key = (normalize_query(query), max_results)
+        results = self._get(key)
+        if results is not None:
+            self.hits += 1
+            return results
+        task = self._in_flight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(key, query, max_results))
+            self._in_flight[key] = task
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._items),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+def make_search_backend(name: str) -> SearchBackend:
+    if name == "rest":
+        return TavilyHTTPBackend(tool_cfg.tavily_base_url, tool_cfg.tavily_api_key, tool_cfg.tavily_timeout_seconds)
+    if name == "langchain":
+        return LangChainTavilyBackend(tool_cfg.tavily_api_key)
+    raise ValueError(f"Unknown tavily_search_api.backend: {name!r} (expected 'langchain' or 'rest')")
+
+
+search_cache = SearchResultCache(
+    make_search_backend(tool_cfg.tavily_backend),
+    ttl_seconds=tool_cfg.tavily_cache_ttl_seconds,
+    max_entries=tool_cfg.tavily_cache_max_entries,
+)
+
 
 @tool
-def query_tavily_web_search(query: str) -> str:
+async def query_tavily_web_search(query: str) -> str:
     """
     Perform a web search for general queries that are not answered by the RAG or SQL agent.
 
-    Uses the Tavily Search API to retrieve the top relevant web pages and returns a concise 
+    Uses the Tavily Search API to retrieve the top relevant web pages and returns a concise
     summary of their contents. This is ideal for questions related to:
     - Health and medicine (e.g., recent outbreaks, symptoms, treatments)
     - Weather and temperature
@@ -31,14 +185,14 @@ def query_tavily_web_search(query: str) -> str:
         str: A concise summary of the top search results or a message if no useful info is found.
     """
     try:
-        results = search_tool.invoke({"query": query, "num_results": tool_cfg.tavily_max_results})
+        results = await search_cache.search(query, tool_cfg.tavily_max_results)
 
-        if not results or "results" not in results:
+        if not results:
             return "No relevant web search results found."
 
         response = "\n\n".join(
-            f"{r['title']}:\n{r['content']}\n(Source: {r['url']})"
-            for r in results["results"]
+            f"{r.get('title', '')}:\n{r['content']}\n(Source: {r['url']})"
+            for r in results
         )
 
         return response
@@ -0,0 +1,55 @@
+from configs.load_tools_config import LoadToolsConfig
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+# Per-worker counters exposed through /metrics
+termination_metrics = {"local_finish": {}, "supervisor_fallback": {}}
+
+# Signs of an incomplete answer (supervisor rule 9 plus the tools' own failure messages)
+refusal_phrases = [
+    "sorry",
+    "need more steps",
+    "not enough data",
+    "not enough information",
+    "i don't know",
+    "i do not know",
+    "i don't have",
+    "i do not have",
+    "unable to",
+    "could not find",
+    "couldn't find",
+    "no relevant",
+    "no matching content",
+    "no useful information",
+    "cannot answer",
+    "can't answer",
+    "another agent",
+    "agent error",
+    "error querying",
+    "error performing",
+]
+
+
+def should_finish(worker: str, answer: str) -> bool:
+    """
+    Decides locally whether a worker's answer completes the query, so the graph can end without
+    another supervisor LLM call whose only job would be to return FINISH.
+
+    An answer is complete when local termination is enabled for the worker, it reaches the worker's
+    minimum length and it contains none of the refusal phrases. Anything doubtful goes back to the
+    supervisor.
+    """
+    min_chars = tool_cfg.termination_min_answer_chars.get(worker)
+    if not tool_cfg.termination_enabled or min_chars is None:
+        return False
+
+    text = answer.strip().lower()
+    if len(text) < min_chars:
+        return False
+    return not any(phrase in text for phrase in refusal_phrases)
+
+
+def record_termination(worker: str, finished_locally: bool) -> None:
+    counters = termination_metrics["local_finish" if finished_locally else "supervisor_fallback"]
+    counters[worker] = counters.get(worker, 0) + 1
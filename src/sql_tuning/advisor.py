@@ -0,0 +1,209 @@
+"""
+Offline index advisor and rollup maintenance for health_database.db, driven by the SQL query log.
+
+The log (written by the SQL tool's executor) is grouped by statement shape. For frequent shapes the
+advisor proposes covering indexes on their equality/range predicates and grouping columns, and rollup
+tables for their aggregates (when the grouping columns have few enough distinct combinations). With
+--apply they are created and recorded in the tuning manifest next to the database, which the executor's
+rewriter reads to route matching aggregate queries to the rollups.
+
+Usage:
+    python -m src.sql_tuning.advisor              # show the log summary and proposals
+    python -m src.sql_tuning.advisor --apply      # create the proposed indexes and rollups
+    python -m src.sql_tuning.advisor --refresh    # rebuild existing rollups after the data changed
+"""
+import os
+import json
+import argparse
+import sqlite3
+from typing import Dict, List
+from configs.load_tools_config import LoadToolsConfig
+from src.agent_graph.schema_catalog import build_schema_catalog
+from src.sql_tuning.query_log import QueryLog
+from src.sql_tuning.query_shape import parse_query
+from src.sql_tuning.rollups import (
+    INDEX_PREFIX, build_rollup, quote, rollup_spec, tuning_manifest_path, slug,
+)
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+
+def _existing_index_prefixes(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    prefixes = []
+    for _, index_name, *_ in conn.execute(f"PRAGMA index_list({quote(table)})"):
+        prefixes.append(tuple(row[2] for row in conn.execute(f"PRAGMA index_info({quote(index_name)})")))
+    return prefixes
+
+
+def propose(summary: List[dict], catalog: dict, min_count: int, max_index_columns: int,
+            max_groups: int) -> Dict[str, List[dict]]:
+    """
+    Index and rollup proposals for the statement shapes seen at least min_count times.
+
+    Args:
+        summary (List[dict]): QueryLog.summary() output.
+        catalog (dict): build_schema_catalog() output for the database.
+        min_count (int): Minimum executions of a shape to consider it.
+        max_index_columns (int): Maximum key + covering columns per index.
+        max_groups (int): Maximum distinct dimension combinations for a rollup.
+
+    Returns:
+        Dict[str, List[dict]]: {"indexes": [{table, columns, score}], "rollups": [{table, dims, measures, score}]}
+    """
+    table_columns = {t: [c["name"] for c in entry["columns"]] for t, entry in catalog["tables"].items()}
+    indexes, rollups = {}, {}
+
+    for group in summary:
+        if group["count"] < min_count:
+            continue
+        shape = parse_query(group["examples"][0], table_columns)
+        if shape is None:
+            continue
+        table_info = catalog["tables"][shape.table]
+
+        # Index: equality columns, then one range column, then grouping and other used columns (covering)
+        key = shape.equality_columns + shape.range_columns[:1]
+        if not key:
+            key = list(shape.group_columns)
+        if key:
+            columns = list(key)
+            for column in shape.group_columns + shape.referenced_columns:
+                if column not in columns and len(columns) < max_index_columns:
+                    columns.append(column)
+            proposal = indexes.setdefault((shape.table, tuple(columns)), {"table": shape.table, "columns": columns, "score": 0.0})
+            proposal["score"] += group["total_seconds"]
+
+        # Rollup: plain aggregates over low-cardinality dimensions
+        measures = [a for f, a in shape.aggregates if " " not in f and a in shape.referenced_columns]
+        simple = len(measures) == len([a for f, a in shape.aggregates if not (f == "COUNT" and a == "*")])
+        if shape.aggregates and simple:
+            dims = tuple(shape.plain_columns)
+            distinct = {c["name"]: c["distinct"] for c in table_info["columns"]}
+            groups = 1
+            for dim in dims:
+                groups *= max(distinct[dim], 1)
+            if groups <= max_groups and groups * 4 <= table_info["row_count"]:
+                proposal = rollups.setdefault((shape.table, dims), {"table": shape.table, "dims": list(dims), "measures": [], "score": 0.0})
+                proposal["measures"] = list(dict.fromkeys(proposal["measures"] + measures))
+                proposal["score"] += group["total_seconds"]
+
+    # An index whose columns are a prefix of another proposal on the same table is redundant
+    index_list = sorted(indexes.values(), key=lambda p: p["score"], reverse=True)
+    index_list = [
+        p for p in index_list
+        if not any(o is not p and o["table"] == p["table"] and o["columns"][:len(p["columns"])] == p["columns"]
+                   and len(o["columns"]) > len(p["columns"]) for o in index_list)
+    ]
+    return {
+        "indexes": index_list,
+        "rollups": sorted(rollups.values(), key=lambda p: p["score"], reverse=True),
+    }
+
+
+def apply_tuning(db_path: str, proposals: Dict[str, List[dict]], manifest_path: str) -> dict:
+    """
+    Creates the proposed indexes and rollups in the database and records them in the tuning manifest.
+
+    Returns:
+        dict: The written manifest.
+    """
+    manifest = {"indexes": [], "rollups": []}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    catalog = build_schema_catalog(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for proposal in proposals["indexes"]:
+            table, columns = proposal["table"], proposal["columns"]
+            if any(prefix[:len(columns)] == tuple(columns) for prefix in _existing_index_prefixes(conn, table)):
+                continue
+            name = f"{INDEX_PREFIX}{slug(table)}_{'_'.join(slug(c) for c in columns)}"[:60]
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})")
+            manifest["indexes"].append({"name": name, "table": table, "columns": columns})
+            print(f"📇 Created index {name}")
+
+        specs = {spec["name"]: spec for spec in manifest["rollups"]}
+        for proposal in proposals["rollups"]:
+            columns = [c["name"] for c in catalog["tables"][proposal["table"]]["columns"]]
+            spec = rollup_spec(proposal["table"], proposal["dims"], proposal["measures"], columns)
+            previous = specs.get(spec["name"])
+            if previous is not None:
+                # keep the measures already materialized, add the new ones
+                spec = rollup_spec(proposal["table"], proposal["dims"],
+                                   list(dict.fromkeys(list(previous["measures"]) + proposal["measures"])), columns)
+            spec["rows"] = build_rollup(conn, spec)
+            specs[spec["name"]] = spec
+            print(f"🧮 Built rollup {spec['name']} ({spec['rows']} rows)")
+        manifest["rollups"] = list(specs.values())
+
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return _write_manifest(db_path, manifest, manifest_path)
+
+
+def refresh_rollups(db_path: str, manifest_path: str) -> dict:
+    """Rebuilds every rollup in the manifest from the current data (after the database was reloaded)."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    conn = sqlite3.connect(db_path)
+    try:
+        for spec in manifest["rollups"]:
+            spec["rows"] = build_rollup(conn, spec)
+            print(f"🧮 Rebuilt rollup {spec['name']} ({spec['rows']} rows)")
+        conn.commit()
+    finally:
+        conn.close()
+    return _write_manifest(db_path, manifest, manifest_path)
+
+
+def _write_manifest(db_path: str, manifest: dict, manifest_path: str) -> dict:
+    # Written last: the rollups are valid for exactly this version of the database file
+    manifest["db_mtime"] = os.path.getmtime(db_path)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Propose and create indexes and rollups from the SQL query log.")
+    parser.add_argument("--db", default=tool_cfg.sql_db_path)
+    parser.add_argument("--log", default=tool_cfg.sql_query_log_path)
+    parser.add_argument("--min-count", type=int, default=tool_cfg.sql_tuning_min_query_count)
+    parser.add_argument("--top", type=int, default=10, help="Statement shapes to print")
+    parser.add_argument("--apply", action="store_true", help="Create the proposed indexes and rollups")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild existing rollups from current data")
+    args = parser.parse_args()
+
+    manifest_path = tuning_manifest_path(args.db)
+    if args.refresh:
+        refresh_rollups(args.db, manifest_path)
+        return
+
+    summary = QueryLog(args.log).summary()
+    print(f"📜 {sum(g['count'] for g in summary)} logged statements, {len(summary)} shapes")
+    for group in summary[:args.top]:
+        print(f"  {group['count']:>5}x  avg {group['avg_seconds'] * 1000:8.2f} ms  {group['shape'][:120]}")
+
+    proposals = propose(
+        summary, build_schema_catalog(args.db), args.min_count,
+        tool_cfg.sql_tuning_max_index_columns, tool_cfg.sql_tuning_rollup_max_groups,
+    )
+    for p in proposals["indexes"]:
+        print(f"📇 Index on {p['table']} ({', '.join(p['columns'])})  score={p['score']:.3f}s")
+    for p in proposals["rollups"]:
+        print(f"🧮 Rollup of {p['table']} by ({', '.join(p['dims']) or '-'}) measures={p['measures']}  score={p['score']:.3f}s")
+
+    if args.apply:
+        apply_tuning(args.db, proposals, manifest_path)
+        print("✅ Tuning applied; run python -m src.sql_tuning.benchmark to measure it")
+
+
+if __name__ == "__main__":
+    main()
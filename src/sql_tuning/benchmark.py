@@ -0,0 +1,114 @@
+"""
+Before/after benchmark of the advisor's indexes and rollups over the recorded SQL query log.
+
+The database is copied twice into a temporary directory: an untuned copy (advisor indexes and rollups
+dropped) and a tuned copy with the current proposals applied. Every distinct logged statement is
+replayed on both, the tuned run going through the rollup rewriter, and the median latencies are
+compared. Results are checked for equality so a wrong rewrite shows up as a mismatch.
+
+Usage:
+    python -m src.sql_tuning.benchmark --limit 50 --repeat 5
+"""
+import os
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from configs.load_tools_config import LoadToolsConfig
+from src.agent_graph.schema_catalog import build_schema_catalog
+from src.sql_tuning.advisor import apply_tuning, propose
+from src.sql_tuning.query_log import QueryLog
+from src.sql_tuning.rollups import INDEX_PREFIX, ROLLUP_PREFIX, RollupRewriter, quote
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+
+def _untuned_copy(db_path: str, target: str) -> None:
+    shutil.copy2(db_path, target)
+    conn = sqlite3.connect(target)
+    try:
+        for kind, name in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('index', 'table')").fetchall():
+            if kind == "index" and name.startswith(INDEX_PREFIX):
+                conn.execute(f"DROP INDEX {quote(name)}")
+            elif kind == "table" and name.startswith(ROLLUP_PREFIX):
+                conn.execute(f"DROP TABLE {quote(name)}")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _time_query(conn: sqlite3.Connection, sql: str, repeat: int):
+    timings, rows = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(sql).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+
+def _same_rows(before: list, after: list) -> bool:
+    def normalize(rows):
+        return sorted(
+            (tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows),
+            key=repr,
+        )
+    return normalize(before) == normalize(after)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark advisor indexes and rollups over the query log.")
+    parser.add_argument("--db", default=tool_cfg.sql_db_path)
+    parser.add_argument("--log", default=tool_cfg.sql_query_log_path)
+    parser.add_argument("--limit", type=int, default=50, help="Distinct statements to replay")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per statement (median reported)")
+    parser.add_argument("--min-count", type=int, default=tool_cfg.sql_tuning_min_query_count)
+    args = parser.parse_args()
+
+    summary = QueryLog(args.log).summary()
+    statements = list(dict.fromkeys(sql for group in summary for sql in group["examples"]))[:args.limit]
+    if not statements:
+        print("ℹ️ The query log is empty; ask the SQL agent some questions first.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_db, after_db = os.path.join(tmp, "before.db"), os.path.join(tmp, "after.db")
+        _untuned_copy(args.db, before_db)
+        shutil.copy2(before_db, after_db)
+        proposals = propose(
+            summary, build_schema_catalog(before_db), args.min_count,
+            tool_cfg.sql_tuning_max_index_columns, tool_cfg.sql_tuning_rollup_max_groups,
+        )
+        manifest_path = os.path.join(tmp, "after.tuning.json")
+        apply_tuning(after_db, proposals, manifest_path)
+        rewriter = RollupRewriter(after_db, manifest_path)
+
+        before_conn = sqlite3.connect(f"file:{before_db}?mode=ro", uri=True)
+        after_conn = sqlite3.connect(f"file:{after_db}?mode=ro", uri=True)
+        total_before, total_after, mismatches = 0.0, 0.0, 0
+        print(f"\n📊 {len(statements)} statements, median of {args.repeat} runs")
+        print(f"{'before ms':>10} {'after ms':>10} {'speedup':>8}  statement")
+        for sql in statements:
+            try:
+                before_ms, before_rows = _time_query(before_conn, sql, args.repeat)
+            except sqlite3.Error:
+                continue
+            rewritten = rewriter.rewrite(sql)
+            after_ms, after_rows = _time_query(after_conn, rewritten, args.repeat)
+            same = _same_rows(before_rows, after_rows)
+            mismatches += not same
+            total_before += before_ms
+            total_after += after_ms
+            marker = (" [rollup]" if rewritten != sql else "") + ("" if same else " ❌ RESULT MISMATCH")
+            print(f"{before_ms:>10.3f} {after_ms:>10.3f} {before_ms / max(after_ms, 1e-6):>7.1f}x  {sql[:90]}{marker}")
+        before_conn.close()
+        after_conn.close()
+
+    print(f"\nTotal: {total_before:.2f} ms -> {total_after:.2f} ms "
+          f"({total_before / max(total_after, 1e-6):.1f}x), {mismatches} result mismatches")
+
+
+if __name__ == "__main__":
+    main()
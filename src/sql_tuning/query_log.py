@@ -0,0 +1,107 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import List, Optional
+from src.sql_tuning.query_shape import shape_key
+
+
+# Inserts between two retention prunes
+PRUNE_EVERY = 1000
+# Distinct statements kept as examples per shape in summary()
+MAX_EXAMPLES = 20
+
+
+class QueryLog:
+    """
+    Log of the SQL statements the SQL tool executed, with their runtime, capped at max_rows.
+
+    Stored in a small SQLite file (WAL, no fsync per write) so logging adds microseconds to a query;
+    the oldest rows are pruned every PRUNE_EVERY inserts. The offline tuning tools read it to find
+    frequent predicates and hot aggregates.
+    """
+
+    def __init__(self, path: str, max_rows: int = 100_000) -> None:
+        self.path = path
+        self.max_rows = max_rows
+        self._inserts = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_log (
+                ts REAL, sql TEXT, executed_sql TEXT, seconds REAL, rows INTEGER, error INTEGER
+            )
+        """)
+        self._conn.create_function("shape_key", 1, shape_key, deterministic=True)
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, executed_sql: str, seconds: float, rows: int, error: bool) -> None:
+        """Logs one execution; executed_sql differs from sql when it was rewritten to a rollup table."""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO query_log VALUES (?, ?, ?, ?, ?, ?)",
+                    (time.time(), sql, executed_sql, seconds, rows, int(error)),
+                )
+                self._inserts += 1
+                if self._inserts % PRUNE_EVERY == 0:
+                    self.prune()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Query log error: {e}")
+
+    def prune(self) -> None:
+        """Deletes all but the newest max_rows rows."""
+        self._conn.execute(
+            "DELETE FROM query_log WHERE rowid <= (SELECT MAX(rowid) FROM query_log) - ?", (self.max_rows,)
+        )
+
+    def entries(self, successful_only: bool = True) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, sql, executed_sql, seconds, rows, error FROM query_log"
+                + (" WHERE error = 0" if successful_only else "")
+            ).fetchall()
+        return [dict(zip(("ts", "sql", "executed_sql", "seconds", "rows", "error"), row)) for row in rows]
+
+    def summary(self) -> List[dict]:
+        """
+        Successful statements grouped by shape (constants masked), most total time first.
+
+        Returns:
+            List[dict]: {"shape", "count", "total_seconds", "avg_seconds", "examples": [distinct sql, ...]}
+        """
+        # Aggregated per shape in SQLite; only one row per distinct statement reaches Python
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT shape, sql, COUNT(*), SUM(seconds) FROM (
+                    SELECT shape_key(sql) AS shape, sql, seconds FROM query_log WHERE error = 0
+                )
+                GROUP BY shape, sql
+                ORDER BY COUNT(*) DESC
+            """).fetchall()
+        groups = {}
+        for shape, sql, count, seconds in rows:
+            group = groups.setdefault(shape, {"count": 0, "total_seconds": 0.0, "examples": []})
+            group["count"] += count
+            group["total_seconds"] += seconds
+            if len(group["examples"]) < MAX_EXAMPLES:
+                group["examples"].append(sql)
+        return sorted(
+            ({"shape": shape, "avg_seconds": g["total_seconds"] / g["count"], **g} for shape, g in groups.items()),
+            key=lambda g: g["total_seconds"],
+            reverse=True,
+        )
+
+
+def open_query_log(path: Optional[str], max_rows: int) -> Optional[QueryLog]:
+    """The query log at path, or None when logging is disabled or the file cannot be opened."""
+    if not path:
+        return None
+    try:
+        return QueryLog(path, max_rows)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ SQL query log disabled ({e})")
+        return None
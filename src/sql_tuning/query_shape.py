@@ -0,0 +1,214 @@
+"""
+Lightweight analysis of single-table SELECT statements, enough for index advice and rollup rewrites.
+
+String literals are masked first so keywords and identifiers inside them are ignored. Statements with
+joins, subqueries, CTEs or set operations are not analysed (parse_query returns None).
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+AGGREGATES = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_identifier = re.compile(r'"((?:[^"]|"")+)"|\[([^\]]+)\]|`([^`]+)`|\b([A-Za-z_][A-Za-z0-9_]*)\b')
+_unsupported = re.compile(r"\b(JOIN|UNION|INTERSECT|EXCEPT|WITH)\b", re.I)
+_statement = re.compile(
+    r"^\s*SELECT\s+(?P<select>.+?)\s+FROM\s+(?P<table>\"(?:[^\"]|\"\")+\"|\[[^\]]+\]|`[^`]+`|\w+)"
+    r"(?P<rest>(?:\s+(?:WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT)\b.*)?)\s*;?\s*$",
+    re.I | re.S,
+)
+_clauses = re.compile(r"\b(WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT)\b", re.I)
+_aggregate_call = re.compile(r"\b(COUNT|SUM|AVG|MIN|MAX)\s*\(", re.I)
+_function_call = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+# Words that may precede "(" without being a function call
+_paren_keywords = {"IN", "AND", "OR", "NOT", "BETWEEN", "IS", "LIKE", "CASE", "WHEN", "THEN", "ELSE",
+                   "SELECT", "WHERE", "BY", "HAVING", "AS", "ON", "DISTINCT", "LIMIT"}
+_literal_placeholder = re.compile(r"\$\d+\$")
+
+
+class QueryShape(NamedTuple):
+    table: str
+    masked: str                      # statement with string literals replaced by $n$ placeholders
+    literals: List[str]
+    clauses: Dict[str, str]          # "select", "where", "group by", "having", "order by", "limit" -> text
+    equality_columns: List[str]      # columns compared with =, IN or IS in top-level AND predicates
+    range_columns: List[str]         # columns compared with <, >, BETWEEN or LIKE
+    group_columns: List[str]
+    # (function, argument): function like "AVG" or "COUNT DISTINCT"; argument a column name, "*" or
+    # the expression as written, e.g. ("COUNT", "*"), ("AVG", "age")
+    aggregates: List[Tuple[str, str]]
+    referenced_columns: List[str]    # every column mentioned anywhere
+    plain_columns: List[str]         # columns mentioned outside aggregate calls
+
+
+def mask_literals(sql: str) -> Tuple[str, List[str]]:
+    literals = []
+
+    def _mask(match):
+        literals.append(match.group(0))
+        return f"${len(literals) - 1}$"
+
+    return _string_literal.sub(_mask, sql), literals
+
+
+def unmask(text: str, literals: List[str]) -> str:
+    return _literal_placeholder.sub(lambda m: literals[int(m.group(0)[1:-1])], text)
+
+
+def shape_key(sql: str) -> str:
+    """Statement with literals and numbers replaced, so queries differing only in constants group together."""
+    masked, _ = mask_literals(sql)
+    masked = re.sub(r"\$\d+\$", "?", masked)
+    # numbers outside quoted identifiers ("Cholera Cases per 100,000 people" keeps its digits)
+    masked = re.sub(r'"(?:[^"]|"")*"|(?<!\w)\d+(?:\.\d+)?\b', lambda m: m.group(0) if m.group(0)[0] == '"' else "?", masked)
+    return re.sub(r"\s+", " ", masked).strip().rstrip(";").strip()
+
+
+def unquote(token: str) -> str:
+    if token[:1] in "\"[`":
+        return token[1:-1].replace('""', '"')
+    return token
+
+
+def column_refs(text: str, columns: Dict[str, str]) -> List[str]:
+    """Columns (by their real name) referenced in text; `columns` maps lower-case name -> real name."""
+    found = []
+    for match in _identifier.finditer(text):
+        name = next(g for g in match.groups() if g is not None)
+        column = columns.get(name.lower())
+        if column is not None and column not in found:
+            found.append(column)
+    return found
+
+
+def split_top_level(text: str, separator: str = ",") -> List[str]:
+    """Splits on a separator outside parentheses."""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == separator and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def aggregate_calls(text: str) -> List[Tuple[int, int, str, str]]:
+    """(start, end, FUNCTION, argument) of every top-level aggregate call in (masked) text."""
+    calls, position = [], 0
+    while True:
+        call = _aggregate_call.search(text, position)
+        if call is None:
+            return calls
+        depth, i = 1, call.end()
+        while i < len(text) and depth:
+            depth += {"(": 1, ")": -1}.get(text[i], 0)
+            i += 1
+        calls.append((call.start(), i, call.group(1).upper(), text[call.end():i - 1].strip()))
+        position = i
+
+
+def function_names(text: str) -> List[str]:
+    """Upper-case names of every function call in (masked) text, aggregates included."""
+    return [m.group(1).upper() for m in _function_call.finditer(text) if m.group(1).upper() not in _paren_keywords]
+
+
+def _split_and(where: str) -> Optional[List[str]]:
+    """Top-level AND conjuncts of a WHERE clause (None when it has a top-level OR)."""
+    depth, tokens = 0, re.split(r"(\(|\)|\bAND\b|\bOR\b|\bBETWEEN\b)", where, flags=re.I)
+    conjuncts, current, in_between = [], [], False
+    for token in tokens:
+        upper = token.strip().upper()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        if depth == 0 and upper == "OR":
+            return None
+        if depth == 0 and upper == "BETWEEN":
+            in_between = True
+        elif depth == 0 and upper == "AND":
+            if in_between:
+                in_between = False
+            else:
+                conjuncts.append("".join(current))
+                current = []
+                continue
+        current.append(token)
+    conjuncts.append("".join(current))
+    return [c.strip() for c in conjuncts if c.strip()]
+
+
+def parse_query(sql: str, table_columns: Dict[str, List[str]]) -> Optional[QueryShape]:
+    """
+    Shape of a single-table SELECT over one of the known tables, or None if it cannot be analysed.
+
+    Args:
+        sql (str): One SQL statement.
+        table_columns (Dict[str, List[str]]): Table name -> column names.
+    """
+    masked, literals = mask_literals(sql)
+    if len(re.findall(r"\bSELECT\b", masked, re.I)) != 1 or _unsupported.search(masked):
+        return None
+    match = _statement.match(masked)
+    if not match:
+        return None
+    table = next((t for t in table_columns if t.lower() == unquote(match.group("table")).lower()), None)
+    if table is None:
+        return None
+    columns = {c.lower(): c for c in table_columns[table]}
+
+    clauses = {"select": match.group("select").strip()}
+    rest = match.group("rest")
+    positions = [(m.start(), m.end(), re.sub(r"\s+", " ", m.group(1)).lower()) for m in _clauses.finditer(rest)]
+    for i, (start, end, name) in enumerate(positions):
+        if name in clauses:
+            return None
+        stop = positions[i + 1][0] if i + 1 < len(positions) else len(rest)
+        clauses[name] = rest[end:stop].strip().rstrip(";").strip()
+
+    equality, ranges = [], []
+    if "where" in clauses:
+        conjuncts = _split_and(clauses["where"])
+        for conjunct in conjuncts or []:
+            refs = column_refs(conjunct, columns)
+            if len(refs) != 1:
+                continue
+            if re.search(r"(?<![<>!])=|\bIN\b|\bIS\b", conjunct, re.I) and not re.search(r"[<>]|\bNOT\b", conjunct, re.I):
+                equality.append(refs[0])
+            elif re.search(r"[<>]|\bBETWEEN\b|\bLIKE\b", conjunct, re.I):
+                ranges.append(refs[0])
+        if conjuncts is None:
+            ranges.extend(column_refs(clauses["where"], columns))
+
+    aggregates = []
+    for _, _, function, argument in aggregate_calls(masked):
+        if re.match(r"DISTINCT\s", argument, re.I):
+            function, argument = f"{function} DISTINCT", argument[len("DISTINCT"):].strip()
+        # Plain column arguments are resolved to the column name; expressions are kept as written
+        if _identifier.fullmatch(argument) and unquote(argument).lower() in columns:
+            argument = columns[unquote(argument).lower()]
+        aggregates.append((function, argument))
+
+    # Columns used outside aggregate calls (select items, filters, grouping, ordering)
+    outside = masked[match.start("select"):]
+    for start, end, _, _ in reversed(aggregate_calls(outside)):
+        outside = outside[:start] + "0" + outside[end:]
+
+    return QueryShape(
+        table=table,
+        masked=masked,
+        literals=literals,
+        clauses=clauses,
+        equality_columns=list(dict.fromkeys(equality)),
+        range_columns=[c for c in dict.fromkeys(ranges) if c not in equality],
+        group_columns=column_refs(clauses.get("group by", ""), columns),
+        aggregates=aggregates,
+        referenced_columns=column_refs(masked[match.start("select"):], columns),
+        plain_columns=column_refs(outside, columns),
+    )
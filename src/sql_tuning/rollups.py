@@ -0,0 +1,159 @@
+"""
+Summary (rollup) tables for hot aggregates and the rewriter that routes generated SQL to them.
+
+A rollup groups a source table by a few low-cardinality dimension columns and stores, per group, the
+row count and SUM/COUNT/MIN/MAX of each measure column. Any aggregate query whose filters, grouping
+and plain select items only use those dimensions can be answered by re-aggregating the rollup:
+COUNT(*) -> SUM(row_count), AVG(x) -> SUM(sum_x) / SUM(count_x), MIN(x) -> MIN(min_x), and so on.
+"""
+import os
+import re
+import json
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+from src.sql_tuning.query_shape import AGGREGATES, aggregate_calls, function_names, parse_query, split_top_level, unmask, unquote
+
+ROLLUP_PREFIX = "rollup_"
+INDEX_PREFIX = "idx_auto_"
+
+
+def tuning_manifest_path(db_path: str) -> str:
+    """Indexes and rollups created by the advisor: sqldb/health_database.db -> sqldb/health_database.tuning.json"""
+    return os.path.splitext(db_path)[0] + ".tuning.json"
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def rollup_spec(table: str, dims: List[str], measures: List[str], columns: List[str]) -> dict:
+    """Names the rollup table and its measure columns."""
+    name = f"{ROLLUP_PREFIX}{slug(table)}_by_{'_'.join(slug(d) for d in dims) or 'all'}"
+    if len(name) > 60:
+        name = name[:51] + "_" + hashlib.sha1(name.encode()).hexdigest()[:8]
+    used = {d.lower() for d in dims} | {"row_count"}
+    measure_columns = {}
+    for i, column in enumerate(measures):
+        base = slug(column)[:40] or f"m{i}"
+        if any(f"{kind}_{base}" in used for kind in ("sum", "count", "min", "max")):
+            base = f"{base}_{i}"
+        measure_columns[column] = {kind: f"{kind}_{base}" for kind in ("sum", "count", "min", "max")}
+        used.update(measure_columns[column].values())
+    return {
+        "name": name,
+        "table": table,
+        "dims": list(dims),
+        "count_column": "row_count",
+        "measures": measure_columns,
+        "columns": list(columns),
+    }
+
+
+def build_rollup(conn: sqlite3.Connection, spec: dict) -> int:
+    """(Re)creates a rollup table from its source table and returns its row count."""
+    dims = ", ".join(quote(d) for d in spec["dims"])
+    aggregates = [f"COUNT(*) AS {spec['count_column']}"]
+    for column, names in spec["measures"].items():
+        for kind, name in names.items():
+            aggregates.append(f"{kind.upper()}({quote(column)}) AS {quote(name)}")
+    select = ", ".join(([dims] if dims else []) + aggregates)
+    group_by = f" GROUP BY {dims}" if dims else ""
+    conn.execute(f"DROP TABLE IF EXISTS {quote(spec['name'])}")
+    conn.execute(f"CREATE TABLE {quote(spec['name'])} AS SELECT {select} FROM {quote(spec['table'])}{group_by}")
+    return conn.execute(f"SELECT COUNT(*) FROM {quote(spec['name'])}").fetchone()[0]
+
+
+class RollupRewriter:
+    """
+    Rewrites aggregate queries over a source table to the smallest rollup that can answer them.
+
+    Rollups are only used while the tuning manifest matches the database file's mtime; once the data
+    changes they are stale and every statement is passed through unchanged until the advisor refreshes
+    them.
+    """
+
+    def __init__(self, db_path: str, manifest_path: Optional[str] = None) -> None:
+        self.db_path = db_path
+        self.manifest_path = manifest_path or tuning_manifest_path(db_path)
+        self._manifest = None
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def _rollups(self) -> List[dict]:
+        if not os.path.exists(self.manifest_path):
+            return []
+        mtime = os.path.getmtime(self.manifest_path)
+        if mtime != self._manifest_mtime:
+            with self._lock:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_mtime = mtime
+        if self._manifest.get("db_mtime") != os.path.getmtime(self.db_path):
+            return []
+        return self._manifest.get("rollups", [])
+
+    @staticmethod
+    def _reaggregate(text: str, spec: dict, columns: Dict[str, str]) -> str:
+        for start, end, function, argument in reversed(aggregate_calls(text)):
+            # COUNT over zero matching rows is 0, while SUM over zero rollup rows is NULL
+            if argument == "*":
+                expression = f"COALESCE(SUM({spec['count_column']}), 0)"
+            else:
+                names = spec["measures"][columns[unquote(argument).lower()]]
+                expression = {
+                    "COUNT": f"COALESCE(SUM({quote(names['count'])}), 0)",
+                    "SUM": f"SUM({quote(names['sum'])})",
+                    "AVG": f"(1.0 * SUM({quote(names['sum'])}) / SUM({quote(names['count'])}))",
+                    "MIN": f"MIN({quote(names['min'])})",
+                    "MAX": f"MAX({quote(names['max'])})",
+                }[function]
+            text = text[:start] + expression + text[end:]
+        return text
+
+    def rewrite(self, sql: str) -> str:
+        """The statement rewritten to a rollup table, or unchanged if no rollup can answer it exactly."""
+        rollups = self._rollups()
+        if not rollups:
+            return sql
+        shape = parse_query(sql, {r["table"]: r["columns"] for r in rollups})
+        if shape is None or not shape.aggregates or re.fullmatch(r"\s*\*\s*", shape.clauses["select"]):
+            return sql
+        # Any other function (GROUP_CONCAT, TOTAL, ...) or a window would see rollup rows, not source rows
+        if re.search(r"\bOVER\b", shape.masked, re.I) or set(function_names(shape.masked)) - set(AGGREGATES):
+            return sql
+        measures = set()
+        for function, argument in shape.aggregates:
+            if argument == "*" and function == "COUNT":
+                continue
+            if argument not in shape.referenced_columns or " " in function:
+                return sql  # DISTINCT or an expression argument cannot be re-aggregated
+            measures.add(argument)
+
+        candidates = [
+            r for r in rollups
+            if r["table"] == shape.table and set(shape.plain_columns) <= set(r["dims"]) and measures <= set(r["measures"])
+        ]
+        if not candidates:
+            return sql
+        spec = min(candidates, key=lambda r: r.get("rows", 0))
+        columns = {c.lower(): c for c in spec["columns"]}
+
+        items = []
+        for item in split_top_level(shape.clauses["select"]):
+            rewritten = self._reaggregate(item, spec, columns)
+            has_alias = re.search(r"(\)\s+|\bAS\s+)(\"(?:[^\"]|\"\")+\"|\w+)\s*$", item, re.I)
+            if rewritten != item and not has_alias:
+                # keep the original column label for the agent
+                rewritten += " AS " + quote(unmask(item, shape.literals))
+            items.append(rewritten)
+        statement = f"SELECT {', '.join(items)} FROM {quote(spec['name'])}"
+        for clause in ("where", "group by", "having", "order by", "limit"):
+            if clause in shape.clauses:
+                statement += f" {clause.upper()} {self._reaggregate(shape.clauses[clause], spec, columns)}"
+        return unmask(statement, shape.literals)
@@ -1,14 +1,110 @@
+import threading
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
+from langchain_huggingface import HuggingFaceEmbeddings
 from configs.load_tools_config import LoadToolsConfig
 
 # Load config once
 tool_cfg = LoadToolsConfig()
 
-def get_llm(model_name: str, temperature: float = 0.0):
+# Process-wide LLM client pool:
+#   (provider, model, temperature) -> chat model
+#   provider -> (httpx.Client, httpx.AsyncClient) shared by every model of that provider
+_llm_clients = {}
+_http_clients = {}
+_pool_lock = threading.Lock()
+
+# Process-wide sentence-transformers embedding model (loaded once, shared by every RAG call)
+_embedding_model = None
+_embedding_lock = threading.Lock()
+
+
+def _get_provider(model_name: str) -> str:
+    """Maps a model name to the provider that serves it."""
     if "gpt" in model_name:
-        return ChatOpenAI(model=model_name, temperature=temperature, api_key=tool_cfg.openai_api_key)
+        return "openai"
     elif "llama" in model_name or "mixtral" in model_name:
-        return ChatGroq(model=model_name, temperature=temperature, api_key=tool_cfg.groq_api_key)
+        return "groq"
     else:
-        raise ValueError(f"Unsupported model: {model_name}")
\ No newline at end of file
+        raise ValueError(f"Unsupported model: {model_name}")
+
+
+def _get_http_clients(provider: str):
+    """Returns the keep-alive (sync, async) HTTP clients for a provider. Caller holds _pool_lock."""
+    if provider not in _http_clients:
+        limits = httpx.Limits(
+            max_connections=tool_cfg.llm_max_connections.get(provider),
+            max_keepalive_connections=tool_cfg.llm_max_keepalive_connections,
+            keepalive_expiry=tool_cfg.llm_keepalive_expiry,
+        )
+        timeout = httpx.Timeout(tool_cfg.llm_request_timeout)
+        _http_clients[provider] = (
+            httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout),
+        )
+    return _http_clients[provider]
+
+
+def get_llm(model_name: str, temperature: float = 0.0):
+    """
+    Returns a pooled chat model for the given model name and temperature.
+
+    Models are created once per (provider, model, temperature) and share their provider's
+    keep-alive HTTP connection pool, so repeated calls reuse warm connections instead of
+    opening a new client (and TLS handshake) per supervisor hop or tool call.
+    """
+    provider = _get_provider(model_name)
+    key = (provider, model_name, float(temperature))
+
+    llm = _llm_clients.get(key)
+    if llm is not None:
+        return llm
+
+    with _pool_lock:
+        if key not in _llm_clients:
+            http_client, http_async_client = _get_http_clients(provider)
+            if provider == "openai":
+                _llm_clients[key] = ChatOpenAI(
+                    model=model_name,
+                    temperature=temperature,
+                    api_key=tool_cfg.openai_api_key,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                )
+            else:
+                _llm_clients[key] = ChatGroq(
+                    model=model_name,
+                    temperature=temperature,
+                    api_key=tool_cfg.groq_api_key,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                )
+        return _llm_clients[key]
+
+
+async def close_llm_clients() -> None:
+    """Closes every pooled HTTP connection. Called from the FastAPI lifespan on shutdown."""
+    with _pool_lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+        _llm_clients.clear()
+
+    for http_client, http_async_client in clients:
+        http_client.close()
+        await http_async_client.aclose()
+
+
+def get_embedding_model() -> HuggingFaceEmbeddings:
+    """Returns the shared embedding model, loading it from disk on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_lock:
+            if _embedding_model is None:
+                _embedding_model = HuggingFaceEmbeddings(model_name=tool_cfg.rag_embedding_model)
+    return _embedding_model
+
+
+def is_embedding_model_ready() -> bool:
+    """True once the embedding model is resident in memory."""
+    return _embedding_model is not None
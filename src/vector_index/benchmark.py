@@ -0,0 +1,74 @@
+"""
+Compares recall@k and latency of the local index search modes against float32 brute force.
+
+Queries are perturbed copies of indexed vectors (no embedding model needed), or real questions
+embedded with the RAG embedding model when --questions points to a text file (one per line).
+
+Usage:
+    python -m src.vector_index.benchmark --queries 200 --k 5 --nprobe 4 8 16
+"""
+import time
+import argparse
+import numpy as np
+from configs.load_tools_config import LoadToolsConfig
+from src.vector_index.local_index import LocalVectorIndex, normalize_rows, top_k_indices
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+
+def _load_queries(index: LocalVectorIndex, n_queries: int, questions_path: str, seed: int) -> np.ndarray:
+    if questions_path:
+        from src.utility import get_embedding_model
+        with open(questions_path) as f:
+            questions = [line.strip() for line in f if line.strip()]
+        return normalize_rows(get_embedding_model().embed_documents(questions))
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), size=min(n_queries, len(index)), replace=False)
+    base = np.asarray(index.vectors[np.sort(rows)], dtype=np.float32)
+    return normalize_rows(base + rng.normal(scale=0.05, size=base.shape).astype(np.float32))
+
+
+def _run(label: str, search, queries: np.ndarray, truth: list, k: int) -> None:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        rows = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(rows) & expected)
+    recall = hits / (k * len(queries))
+    p50, p95 = np.percentile(latencies, [50, 95])
+    print(f"{label:<22} recall@{k}={recall:.3f}  p50={p50:.3f} ms  p95={p95:.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the local guideline vector index.")
+    parser.add_argument("--index-dir", default=tool_cfg.rag_local_index_dir)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--questions", default=None, help="Text file of questions to embed as queries")
+    parser.add_argument("--k", type=int, default=tool_cfg.rag_k)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[tool_cfg.rag_ivf_nprobe])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    index = LocalVectorIndex(args.index_dir)
+    queries = _load_queries(index, args.queries, args.questions, args.seed)
+
+    # Ground truth: in-RAM float32 brute force over the same vectors
+    matrix = np.asarray(index.vectors, dtype=np.float32)
+    truth = [set(top_k_indices(matrix @ q, args.k).tolist()) for q in queries]
+
+    print(f"📊 {len(index)} vectors ({index.manifest['dtype']}, dim={index.manifest['dim']}), {len(queries)} queries")
+    _run("brute force (RAM)", lambda q: top_k_indices(matrix @ q, args.k).tolist(), queries, truth, args.k)
+    _run("exact (mmap)", lambda q: [r for _, r in index.search(q, args.k)], queries, truth, args.k)
+    if index.centroids is None:
+        print("ℹ️ Index was built without IVF lists (nlist=0); skipping IVF runs.")
+        return
+    for nprobe in args.nprobe:
+        _run(f"ivf nprobe={nprobe}", lambda q: [r for _, r in index.search(q, args.k, "ivf", nprobe)],
+             queries, truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
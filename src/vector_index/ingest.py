@@ -0,0 +1,347 @@
+"""
+Incremental ingestion of the guideline PDFs into the configured vector index (local or Pinecone).
+
+Pages are streamed from the PDFs and chunked lazily. A per-backend manifest records each page's
+content hash and the ids of its chunks, so a re-run only re-chunks pages whose text changed and only
+embeds chunks whose content hash is new. Chunks that no longer appear anywhere are deleted, and reused
+chunks whose text moved to another page (e.g. after a page was inserted) get their page updated.
+
+Usage:
+    python -m src.vector_index.ingest
+    python -m src.vector_index.ingest --backend pinecone --workers 4 --batch-size 128
+    python -m src.vector_index.ingest --full      # ignore the manifest and re-embed everything
+"""
+import os
+import json
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from pypdf import PdfReader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from configs.load_tools_config import LoadToolsConfig
+from src.vector_index.local_index import LocalVectorIndex
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+PINECONE_UPSERT_BATCH = 100
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source_pdf: str, text: str) -> str:
+    """Content-addressed chunk id: identical text in the same PDF always maps to the same vector."""
+    return _sha256(f"{source_pdf}\0{text}")[:32]
+
+
+# ---------- STREAMING READ / CHUNK ----------
+
+def list_pdfs(pdf_dir: str) -> List[str]:
+    """The PDF file names in pdf_dir, sorted; raises if the directory is missing or holds no PDFs."""
+    if not os.path.isdir(pdf_dir):
+        raise FileNotFoundError(f"PDF directory not found: {pdf_dir}")
+    pdfs = sorted(name for name in os.listdir(pdf_dir) if name.lower().endswith(".pdf"))
+    if not pdfs:
+        raise ValueError(f"No PDFs found in {pdf_dir}")
+    return pdfs
+
+
+def iter_pdf_pages(pdf_dir: str) -> Iterator[Tuple[str, int, str]]:
+    """Yields (source_pdf, page_number, page_text) one page at a time."""
+    for file_name in list_pdfs(pdf_dir):
+        reader = PdfReader(os.path.join(pdf_dir, file_name))
+        for page_number, page in enumerate(reader.pages, start=1):
+            yield file_name, page_number, page.extract_text() or ""
+
+
+def iter_page_chunks(source_pdf: str, page_number: int, text: str,
+                     splitter: RecursiveCharacterTextSplitter) -> Iterator[dict]:
+    """Yields the chunk records of one page, carrying the source_pdf metadata the RAG tool reads."""
+    for chunk in splitter.split_text(text):
+        yield {
+            "id": chunk_id(source_pdf, chunk),
+            "text": chunk,
+            "source_pdf": source_pdf,
+            "page": page_number,
+        }
+
+
+def _batched(items: Iterator[dict], batch_size: int) -> Iterator[List[dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------- EMBEDDING (process pool) ----------
+
+_worker_embeddings = None
+
+def _init_embed_worker(model_name: str) -> None:
+    """Loads the embedding model once per pool process."""
+    global _worker_embeddings
+    from langchain_huggingface import HuggingFaceEmbeddings
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name)
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+def iter_embedded_batches(chunks: Iterator[dict], batch_size: int,
+                          workers: int) -> Iterator[Tuple[List[dict], List[List[float]]]]:
+    """
+    Embeds chunks in batches and yields (batch, vectors) in input order.
+
+    With workers > 1 batches are spread over a process pool; at most 2 * workers batches are in
+    flight, so memory stays bounded however large the corpus is.
+    """
+    if workers <= 1:
+        from src.utility import get_embedding_model
+        embeddings = get_embedding_model()
+        for batch in _batched(chunks, batch_size):
+            yield batch, embeddings.embed_documents([c["text"] for c in batch])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_embed_worker,
+                             initargs=(tool_cfg.rag_embedding_model,)) as pool:
+        in_flight = deque()
+        for batch in _batched(chunks, batch_size):
+            in_flight.append((batch, pool.submit(_embed_texts, [c["text"] for c in batch])))
+            if len(in_flight) >= 2 * workers:
+                done_batch, future = in_flight.popleft()
+                yield done_batch, future.result()
+        while in_flight:
+            done_batch, future = in_flight.popleft()
+            yield done_batch, future.result()
+
+
+# ---------- SINKS ----------
+
+class LocalIndexSink:
+    """Applies upserts/deletes to a LocalVectorIndex, reusing stored vectors for unchanged chunks."""
+
+    def __init__(self, index_dir: str, dtype: str, nlist: int) -> None:
+        self.index_dir = index_dir
+        self.dtype = dtype
+        self.nlist = nlist
+        self.index = LocalVectorIndex(index_dir) if os.path.exists(os.path.join(index_dir, "index.json")) else None
+        self.new_rows: List[dict] = []
+        self.new_vectors: List[List[float]] = []
+        self.deleted = set()
+        self.moved: Dict[str, int] = {}
+        self.rebuild = False
+
+    def upsert(self, records: List[dict], vectors: List[List[float]]) -> None:
+        self.new_rows.extend(records)
+        self.new_vectors.extend(vectors)
+
+    def delete(self, ids: List[str]) -> None:
+        self.deleted.update(ids)
+
+    def move(self, pages: Dict[str, int]) -> None:
+        """Updates the page of reused chunks whose text now sits on another page."""
+        self.moved.update(pages)
+
+    def reset(self) -> None:
+        """Drops the existing rows on close: the index is rebuilt from this run's chunks only."""
+        self.rebuild = True
+
+    def close(self) -> None:
+        if not self.new_rows and not self.deleted and not self.moved and not self.rebuild and self.index is not None:
+            return
+
+        replaced = self.deleted | {row["id"] for row in self.new_rows}
+        rows, vectors = [], []
+        if self.index is not None and not self.rebuild:
+            keep = [i for i, row in enumerate(self.index.metadata) if row.get("id") not in replaced]
+            rows = [self.index.metadata[i] for i in keep]
+            rows = [dict(row, page=self.moved[row["id"]]) if row.get("id") in self.moved else row for row in rows]
+            vectors = [np.asarray(self.index.vectors[keep], dtype=np.float32)]
+        if self.new_vectors:
+            vectors.append(np.asarray(self.new_vectors, dtype=np.float32))
+        rows.extend(self.new_rows)
+
+        if not rows:
+            raise ValueError("Ingestion would leave the local index empty")
+
+        LocalVectorIndex.build(
+            self.index_dir, np.concatenate(vectors), rows, dtype=self.dtype, nlist=self.nlist,
+            embedding_model=tool_cfg.rag_embedding_model,
+        )
+
+
+class PineconeSink:
+    """Upserts/deletes vectors in the Pinecone index (text stored under "text" for PineconeVectorStore)."""
+
+    def __init__(self, index_name: str) -> None:
+        from pinecone import Pinecone
+        self.index = Pinecone(api_key=tool_cfg.pinecone_api_key).Index(index_name)
+        self.upserted = 0
+
+    def upsert(self, records: List[dict], vectors: List[List[float]]) -> None:
+        payload = [
+            {"id": r["id"], "values": list(v),
+             "metadata": {"text": r["text"], "source_pdf": r["source_pdf"], "page": r["page"]}}
+            for r, v in zip(records, vectors)
+        ]
+        for start in range(0, len(payload), PINECONE_UPSERT_BATCH):
+            self.index.upsert(vectors=payload[start:start + PINECONE_UPSERT_BATCH])
+        self.upserted += len(payload)
+
+    def delete(self, ids: List[str]) -> None:
+        if not self.upserted and len(ids) >= self.index.describe_index_stats().total_vector_count:
+            raise ValueError("Ingestion would leave the Pinecone index empty")
+        for start in range(0, len(ids), PINECONE_UPSERT_BATCH):
+            self.index.delete(ids=ids[start:start + PINECONE_UPSERT_BATCH])
+
+    def move(self, pages: Dict[str, int]) -> None:
+        """Updates the page metadata of reused chunks whose text now sits on another page."""
+        for cid, page in pages.items():
+            self.index.update(id=cid, set_metadata={"page": page})
+
+    def reset(self) -> None:
+        """Deletes every vector in the namespace before a rebuild (called right before the first upsert)."""
+        self.index.delete(delete_all=True)
+
+    def close(self) -> None:
+        pass
+
+
+# ---------- PIPELINE ----------
+
+def ingest_manifest_path(backend: str) -> str:
+    """Manifest of the last ingestion run into a backend (rewritten whenever the index changes)."""
+    return os.path.join(tool_cfg.rag_ingest_manifest_dir, f"ingest_manifest_{backend}.json")
+
+
+def _load_manifest(path: str, settings: dict) -> dict:
+    """Loads the previous run's manifest; a change in chunking/embedding settings invalidates it."""
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("settings") == settings:
+            return manifest
+        print("ℹ️ Chunking/embedding settings changed since the last run; re-indexing every page.")
+        return {"settings": settings, "pages": {}, "stale_ids": sorted(
+            {cid for page in manifest.get("pages", {}).values() for cid in page["chunk_ids"]}
+        )}
+    return {"settings": settings, "pages": {}}
+
+
+def run_ingest(pdf_dir: str, sink, manifest_path: str, batch_size: int, workers: int, full: bool = False) -> dict:
+    """
+    Streams the PDFs through chunking and embedding into the sink, touching only changed content.
+
+    Returns:
+        dict: Run statistics (pages seen/unchanged, chunks embedded/deleted).
+    """
+    settings = {
+        "embedding_model": tool_cfg.rag_embedding_model,
+        "chunk_size": tool_cfg.rag_chunk_size,
+        "chunk_overlap": tool_cfg.rag_chunk_overlap,
+    }
+    list_pdfs(pdf_dir)  # fail before touching the index if there is nothing to ingest
+    # Rows written before manifests existed (or by another tool) have unknown ids; re-adding every chunk
+    # next to them would duplicate the index, so it is rebuilt from this run only. The reset waits for
+    # the first embedded batch, so a run that fails earlier leaves the index as it was.
+    pending_reset = not os.path.exists(manifest_path)
+    if pending_reset:
+        print("ℹ️ No ingestion manifest found; rebuilding the index from scratch.")
+    manifest = _load_manifest(manifest_path, settings)
+    old_pages = {} if full else manifest["pages"]
+    # Content-addressed ids survive a page shift (e.g. a page inserted in a revision); their page is fixed up
+    known_pages = {cid: int(key.rsplit(":", 1)[1]) for key, page in old_pages.items() for cid in page["chunk_ids"]}
+    known_ids = set(known_pages)
+    moved = {}
+    stale_ids = set(manifest.get("stale_ids", []))
+    if full:
+        stale_ids |= {cid for page in manifest["pages"].values() for cid in page["chunk_ids"]}
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=tool_cfg.rag_chunk_size, chunk_overlap=tool_cfg.rag_chunk_overlap
+    )
+    new_pages = {}
+    live_ids = set()
+    stats = {"pages": 0, "pages_unchanged": 0, "chunks_embedded": 0, "chunks_deleted": 0, "chunks_moved": 0}
+
+    def chunks_to_embed() -> Iterator[dict]:
+        for source_pdf, page_number, text in iter_pdf_pages(pdf_dir):
+            stats["pages"] += 1
+            key = f"{source_pdf}:{page_number}"
+            page_hash = _sha256(text)
+            previous = old_pages.get(key)
+            if previous and previous["page_hash"] == page_hash:
+                stats["pages_unchanged"] += 1
+                new_pages[key] = previous
+                live_ids.update(previous["chunk_ids"])
+                continue
+
+            chunk_ids = []
+            for chunk in iter_page_chunks(source_pdf, page_number, text, splitter):
+                chunk_ids.append(chunk["id"])
+                if chunk["id"] in live_ids or chunk["id"] in known_ids:
+                    if chunk["id"] not in live_ids and known_pages[chunk["id"]] != page_number:
+                        moved[chunk["id"]] = page_number
+                    live_ids.add(chunk["id"])
+                    continue
+                live_ids.add(chunk["id"])
+                yield chunk
+            new_pages[key] = {"page_hash": page_hash, "chunk_ids": chunk_ids}
+
+    for batch, vectors in iter_embedded_batches(chunks_to_embed(), batch_size, workers):
+        if pending_reset:
+            sink.reset()
+            pending_reset = False
+        sink.upsert(batch, vectors)
+        stats["chunks_embedded"] += len(batch)
+
+    if not live_ids:
+        raise ValueError(f"Ingestion would leave the index empty: no text chunks found in {pdf_dir}")
+    deleted = sorted((known_ids | stale_ids) - live_ids)
+    if deleted:
+        sink.delete(deleted)
+    if moved:
+        sink.move(moved)
+    stats["chunks_moved"] = len(moved)
+    stats["chunks_deleted"] = len(deleted)
+    sink.close()
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump({"settings": settings, "pages": new_pages}, f)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally index the guideline PDFs.")
+    parser.add_argument("--backend", default=tool_cfg.rag_backend, choices=["local", "pinecone"])
+    parser.add_argument("--pdf-dir", default=tool_cfg.rag_pdf_dir)
+    parser.add_argument("--batch-size", type=int, default=tool_cfg.rag_embed_batch_size)
+    parser.add_argument("--workers", type=int, default=tool_cfg.rag_embed_workers)
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed every chunk")
+    args = parser.parse_args()
+
+    if args.backend == "local":
+        sink = LocalIndexSink(tool_cfg.rag_local_index_dir, tool_cfg.rag_local_index_dtype, tool_cfg.rag_ivf_nlist)
+    else:
+        sink = PineconeSink(tool_cfg.rag_pinecone_index)
+    manifest_path = ingest_manifest_path(args.backend)
+
+    stats = run_ingest(args.pdf_dir, sink, manifest_path, args.batch_size, args.workers, full=args.full)
+    print(
+        f"✅ {stats['pages']} pages ({stats['pages_unchanged']} unchanged), "
+        f"{stats['chunks_embedded']} chunks embedded, {stats['chunks_deleted']} deleted, {stats['chunks_moved']} moved"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import json
+import asyncio
+from typing import List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+# Files that make up an index directory
+VECTORS_FILE = "vectors.npy"          # (n, dim) float32/float16 matrix, L2-normalized, memory-mapped at load
+METADATA_FILE = "metadata.jsonl"      # one JSON object per row: {"id", "text", "source_pdf", ...}
+MANIFEST_FILE = "index.json"          # dim, dtype, count, nlist, embedding model
+CENTROIDS_FILE = "ivf_centroids.npy"  # (nlist, dim) float32 IVF centroids
+ASSIGNMENTS_FILE = "ivf_assignments.npy"  # (n,) int32 cluster id per row
+
+# Rows scored per block during exact search (bounds the float32 working copy of a float16 matrix)
+SEARCH_BLOCK_ROWS = 65536
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows so that inner product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _atomic_write(index_dir: str, file_name: str, write) -> None:
+    """Writes a file via a temp file + rename, so readers that memory-mapped the old file keep a valid view."""
+    path = os.path.join(index_dir, file_name)
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+    os.replace(path + ".tmp", path)
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, n_iter: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means over normalized vectors.
+
+    Returns:
+        (centroids, assignments): (nlist, dim) float32 centroids and the (n,) int32 cluster of each row.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(vectors, dtype=np.float32)
+    nlist = max(1, min(nlist, len(data)))
+    centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = data[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                # Re-seed empty clusters with a random row
+                centroids[c] = data[rng.integers(len(data))]
+        centroids = normalize_rows(centroids)
+
+    assignments = np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+    return centroids, assignments
+
+
+class LocalVectorIndex:
+    """
+    On-disk vector index whose vector matrix is memory-mapped instead of loaded into RAM.
+
+    Vectors are stored L2-normalized, so search scores are cosine similarities. Search is either
+    exact (blockwise scan of the whole matrix) or IVF (scan only the rows of the nprobe clusters
+    whose centroids are closest to the query).
+
+    Attributes:
+        vectors (np.memmap): (n, dim) normalized vector matrix.
+        metadata (List[dict]): Per-row metadata, including "text" and "source_pdf".
+        manifest (dict): Index properties written at build time.
+    """
+
+    def __init__(self, index_dir: str) -> None:
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(index_dir, METADATA_FILE)) as f:
+            self.metadata = [json.loads(line) for line in f if line.strip()]
+
+        # IVF inverted lists: rows sorted by cluster plus per-cluster offsets
+        self.centroids = None
+        if self.manifest.get("nlist"):
+            self.centroids = np.load(os.path.join(index_dir, CENTROIDS_FILE))
+            assignments = np.load(os.path.join(index_dir, ASSIGNMENTS_FILE))
+            self._ivf_rows = np.argsort(assignments, kind="stable")
+            self._ivf_offsets = np.searchsorted(
+                assignments[self._ivf_rows], np.arange(len(self.centroids) + 1)
+            )
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @classmethod
+    def build(cls, index_dir: str, vectors, metadatas: List[dict], dtype: str = "float32",
+              nlist: int = 0, embedding_model: str = None) -> "LocalVectorIndex":
+        """
+        Writes a new index directory and opens it.
+
+        Args:
+            index_dir (str): Output directory (created if missing, files overwritten).
+            vectors: (n, dim) embeddings, one per metadata row.
+            metadatas (List[dict]): Row metadata; must contain "text" and "source_pdf".
+            dtype (str): On-disk precision, "float32" or "float16".
+            nlist (int): Number of IVF clusters to train (0 disables IVF).
+            embedding_model (str): Name of the model that produced the vectors.
+        """
+        vectors = normalize_rows(vectors)
+        if len(vectors) != len(metadatas):
+            raise ValueError(f"Got {len(vectors)} vectors for {len(metadatas)} metadata rows")
+
+        os.makedirs(index_dir, exist_ok=True)
+        _atomic_write(index_dir, VECTORS_FILE, lambda f: np.save(f, vectors.astype(dtype)))
+        _atomic_write(index_dir, METADATA_FILE,
+                      lambda f: f.writelines((json.dumps(row) + "\n").encode() for row in metadatas))
+
+        nlist = min(nlist, len(vectors))
+        if nlist:
+            centroids, assignments = train_ivf(vectors, nlist)
+            _atomic_write(index_dir, CENTROIDS_FILE, lambda f: np.save(f, centroids))
+            _atomic_write(index_dir, ASSIGNMENTS_FILE, lambda f: np.save(f, assignments))
+
+        manifest = {
+            "count": len(vectors),
+            "dim": int(vectors.shape[1]) if len(vectors) else 0,
+            "dtype": dtype,
+            "nlist": nlist,
+            "embedding_model": embedding_model,
+        }
+        _atomic_write(index_dir, MANIFEST_FILE, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+        return cls(index_dir)
+
+    def _score_rows(self, query: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """Cosine scores of the query against the given rows (all rows if None)."""
+        if rows is not None:
+            return np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def search(self, query_vector, k: int, mode: str = "exact", nprobe: int = 8) -> List[Tuple[float, int]]:
+        """
+        Finds the k rows most similar to a query embedding.
+
+        Args:
+            query_vector: (dim,) query embedding (normalized here).
+            k (int): Number of results.
+            mode (str): "exact" or "ivf" (falls back to exact if the index has no IVF lists).
+            nprobe (int): IVF clusters to scan.
+
+        Returns:
+            List[Tuple[float, int]]: (score, row) pairs, best first.
+        """
+        query = normalize_rows(query_vector)
+        if mode == "ivf" and self.centroids is not None:
+            probes = top_k_indices(self.centroids @ query, nprobe)
+            rows = np.concatenate(
+                [self._ivf_rows[self._ivf_offsets[c]:self._ivf_offsets[c + 1]] for c in probes]
+            )
+            rows = np.sort(rows)
+            scores = self._score_rows(query, rows)
+            return [(float(scores[i]), int(rows[i])) for i in top_k_indices(scores, k)]
+
+        scores = self._score_rows(query)
+        return [(float(scores[i]), int(i)) for i in top_k_indices(scores, k)]
+
+
+class LocalVectorStore:
+    """
+    Minimal vector-store adapter over a LocalVectorIndex.
+
+    Exposes the same similarity_search(query, k) -> List[Document] call the RAG tool makes on
+    PineconeVectorStore, with the chunk text as page_content and the row metadata (source_pdf, ...).
+    """
+
+    def __init__(self, index: LocalVectorIndex, embedding, search_mode: str = "exact", nprobe: int = 8) -> None:
+        self.index = index
+        self.embedding = embedding
+        self.search_mode = search_mode
+        self.nprobe = nprobe
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        query_vector = self.embedding.embed_query(query)
+        docs = []
+        for score, row in self.index.search(query_vector, k, mode=self.search_mode, nprobe=self.nprobe):
+            metadata = dict(self.index.metadata[row])
+            text = metadata.pop("text", "")
+            metadata["score"] = score
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    async def asimilarity_search(self, query: str, k: int = 4) -> List[Document]:
+        # Embedding and the matrix scan are CPU-bound; keep them off the event loop
+        return await asyncio.to_thread(self.similarity_search, query, k)
@@ -0,0 +1,62 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from configs.load_tools_config import LoadToolsConfig
+
+# Load config
+tool_cfg = LoadToolsConfig()
+
+
+def audio_key(text: str, voice: str, model: str, response_format: str) -> str:
+    """Content address of a synthesized segment: sha256 over (text, voice, model, format)."""
+    payload = json.dumps([text, voice, model, response_format], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Synthesized audio segments by content address, LRU-evicted past max_bytes.
+
+    Answers are synthesized sentence by sentence, so repeated answers and recurring sentences
+    (disclaimers, greetings) are served from memory instead of another TTS request.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._items.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        if not audio or len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._size -= len(self._items.pop(key))
+            self._items[key] = audio
+            self._size += len(audio)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self._size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+audio_cache = AudioCache(max_bytes=tool_cfg.tts_cache_max_bytes)
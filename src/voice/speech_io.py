@@ -1,63 +1,304 @@
-import os
+import io
+import re
+import wave
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import AsyncIterator, BinaryIO, Iterator, List, Set, Tuple, Union
+import httpx
 import requests
-import json
-from tempfile import NamedTemporaryFile
+from requests.adapters import HTTPAdapter
 from configs.load_tools_config import LoadToolsConfig
+from src.voice.audio_cache import audio_cache, audio_key
 
 # Load environment variables and configuration
 tool_cfg = LoadToolsConfig()
 
-# Voice → Text using Groq Whisper API
-def transcribe_audio(audio_bytes: bytes) -> str:
-    with NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-        temp_file.write(audio_bytes)
-        temp_path = temp_file.name
+# Raw bytes or a readable binary stream (e.g. an uploaded file) — never written to disk
+AudioInput = Union[bytes, bytearray, BinaryIO]
 
-    whisper_url = "https://api.groq.com/openai/v1/audio/transcriptions"
-    headers = {
-        "Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}"
-    }
-    files = {
-        "file": (temp_path, open(temp_path, "rb")),
-        "model": (None, tool_cfg.whisper_model),
-        "temperature": (None, "0"),
-        "response_format": (None, "verbose_json"),
-        #"timestamp_granularities": (None, '["word"]'),
-        "language": (None, "en")
+# ---------- pooled HTTP clients ----------
+_session = None
+_session_lock = threading.Lock()
+_async_clients = {}  # event loop -> httpx.AsyncClient (clients cannot be shared across loops)
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session for the speech endpoints (connections reused across calls)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=tool_cfg.speech_pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Authorization"] = f"Bearer {tool_cfg.groq_api_key}"
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Keep-alive async client for the speech endpoints, one per event loop."""
+    global _async_clients
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients = {l: c for l, c in _async_clients.items() if not l.is_closed()}
+        _async_clients[loop] = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {tool_cfg.groq_api_key}"},
+            limits=httpx.Limits(max_connections=tool_cfg.speech_pool_size),
+        )
+    return _async_clients[loop]
+
+
+# ---------- Voice → Text (Whisper-compatible transcription API) ----------
+def _transcription_form() -> dict:
+    return {
+        "model": tool_cfg.whisper_model,
+        "temperature": "0",
+        "response_format": "json",  # only the text is used
+        "language": "en",
     }
 
-    response = requests.post(whisper_url, headers=headers, files=files)
+
+def _audio_file(audio: AudioInput) -> tuple:
+    stream = io.BytesIO(audio) if isinstance(audio, (bytes, bytearray)) else audio
+    return ("audio.wav", stream, "audio/wav")
+
+
+def _transcript(result: dict) -> str:
+    if "text" not in result:
+        raise ValueError(f"No 'text' field in response: {result}")
+    print(f"🔍 Whisper transcribed {len(result['text'])} characters")
+    return result["text"]
+
+
+def transcribe_audio(audio: AudioInput) -> str:
+    """
+    Transcribes a voice clip with the configured Whisper endpoint.
+
+    Args:
+        audio (AudioInput): WAV audio as bytes or a readable binary stream; uploaded straight from memory.
+
+    Returns:
+        str: The transcript, or an error message starting with ❌.
+    """
     try:
-        result = response.json()
-        print("🔍 Whisper response JSON:", json.dumps(result, indent=2))
-        if "text" in result:
-            return result["text"]
-        else:
-            raise ValueError(f"No 'text' field in response: {result}")
+        response = get_session().post(
+            tool_cfg.whisper_url,
+            data=_transcription_form(),
+            files={"file": _audio_file(audio)},
+            timeout=tool_cfg.whisper_timeout_seconds,
+        )
+        response.raise_for_status()
+        return _transcript(response.json())
     except Exception as e:
         return f"❌ Whisper transcription failed: {e}"
 
-# Text → Voice using Groq TTS (playai-tts) — returns audio bytes
-def synthesize_speech(text: str) -> bytes:
-    tts_url = "https://api.groq.com/openai/v1/audio/speech"
-    headers = {
-        "Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+
+async def atranscribe_audio(audio: AudioInput) -> str:
+    """Async variant of transcribe_audio()."""
+    try:
+        response = await get_async_client().post(
+            tool_cfg.whisper_url,
+            data=_transcription_form(),
+            files={"file": _audio_file(audio)},
+            timeout=tool_cfg.whisper_timeout_seconds,
+        )
+        response.raise_for_status()
+        return _transcript(response.json())
+    except Exception as e:
+        return f"❌ Whisper transcription failed: {e}"
+
+
+# ---------- Text → Voice (Groq TTS, playai-tts) — returns audio bytes ----------
+_sentence_break = re.compile(r"(?<=[.!?])\s+|\n+")
+_tts_threads = ThreadPoolExecutor(max_workers=tool_cfg.tts_max_concurrency, thread_name_prefix="tts")
+_inflight = {}  # segment key -> Future, so a segment requested twice while pending is synthesized once
+_inflight_lock = threading.Lock()
+
+
+def split_sentences(text: str, min_chars: int, max_chars: int) -> List[str]:
+    """
+    Splits text into TTS segments: one per sentence, so recurring sentences hit the audio cache.
+    Sentences shorter than min_chars are joined to the next one; longer than max_chars are cut at a
+    comma or space.
+    """
+    pieces = []
+    for sentence in _sentence_break.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(", ", 0, max_chars)
+            if cut < min_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars - 1
+            pieces.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) < min_chars and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def join_audio(segments: List[bytes], response_format: str) -> bytes:
+    """Concatenates segments into one clip (MP3 frames concatenate; WAV needs one header)."""
+    if response_format != "wav" or len(segments) < 2:
+        return b"".join(segments)
+    output = io.BytesIO()
+    with wave.open(output, "wb") as merged:
+        for i, segment in enumerate(segments):
+            with wave.open(io.BytesIO(segment), "rb") as part:
+                if i == 0:
+                    merged.setparams(part.getparams())
+                merged.writeframes(part.readframes(part.getnframes()))
+    return output.getvalue()
+
+
+def _speech_payload(text: str) -> dict:
+    return {
         "model": tool_cfg.playai_model,  # e.g., "playai-tts"
         "input": text,
         "voice": tool_cfg.playai_voice,       #"Arista-PlayAI"  # Other options available
         "response_format": tool_cfg.playai_response_format,  # e.g., "mp3" or "wav"
     }
 
-    response = requests.post(tts_url, headers=headers, json=payload)
+
+def _segment_key(text: str) -> str:
+    return audio_key(text, tool_cfg.playai_voice, tool_cfg.playai_model, tool_cfg.playai_response_format)
+
+
+def _tts_request(text: str) -> bytes:
+    try:
+        response = get_session().post(tool_cfg.playai_url, json=_speech_payload(text), timeout=tool_cfg.playai_timeout_seconds)
+    except requests.RequestException as e:
+        print(f"❌ Groq TTS failed: {e}")
+        return b""
     if response.status_code == 200:
         return response.content  # raw audio bytes
     else:
         print(f"❌ Groq TTS failed: {response.status_code} - {response.text}")
         return b""  # return empty bytes if failed
 
+
+async def _atts_request(text: str) -> bytes:
+    try:
+        response = await get_async_client().post(
+            tool_cfg.playai_url, json=_speech_payload(text), timeout=tool_cfg.playai_timeout_seconds
+        )
+    except httpx.HTTPError as e:
+        print(f"❌ Groq TTS failed: {e}")
+        return b""
+    if response.status_code == 200:
+        return response.content
+    print(f"❌ Groq TTS failed: {response.status_code} - {response.text}")
+    return b""
+
+
+def _synthesize_segment(text: str) -> bytes:
+    key = _segment_key(text)
+    audio = audio_cache.get(key)
+    if audio is None:
+        audio = _tts_request(text)
+        audio_cache.put(key, audio)  # failures (empty audio) are not cached
+    return audio
+
+
+def _segment_future(text: str) -> Tuple[Future, bool]:
+    """The pending synthesis of a segment, started unless one is already running; and whether it was started here."""
+    key = _segment_key(text)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = _tts_threads.submit(_synthesize_segment, text)
+        _inflight[key] = future
+    future.add_done_callback(lambda _: _inflight.pop(key, None))
+    return future, True
+
+
+def prefetch_speech(partial_text: str, started: Set[str]) -> None:
+    """
+    Starts synthesizing the finished segments of an answer that is still streaming, so the final
+    stream_speech() call finds them in the audio cache or already in flight.
+
+    Args:
+        partial_text (str): The answer text received so far; its last segment may be unfinished and is skipped.
+        started (Set[str]): Segments already started for this answer; updated in place.
+    """
+    chunks = split_sentences(partial_text, tool_cfg.tts_chunk_min_chars, tool_cfg.tts_chunk_max_chars)
+    for chunk in chunks[:-1]:
+        if chunk not in started:
+            started.add(chunk)
+            _segment_future(chunk)
+
+
+def stream_speech(text: str) -> Iterator[bytes]:
+    """
+    Synthesizes text sentence by sentence and yields the audio segments in order.
+
+    Segments are synthesized concurrently on a shared pool (playai_config.max_concurrency requests at
+    a time across all callers) and each one is yielded as soon as it and those before it are ready, so
+    playback can start after the first sentence. Cached segments cost no request, and segments already
+    started by prefetch_speech() are awaited rather than requested again. A segment whose synthesis
+    fails is skipped.
+    """
+    chunks = split_sentences(text, tool_cfg.tts_chunk_min_chars, tool_cfg.tts_chunk_max_chars)
+    futures = [_segment_future(chunk) for chunk in chunks]
+    try:
+        for future, _ in futures:
+            try:
+                audio = future.result()
+            except CancelledError:
+                continue  # another caller that started this segment stopped early
+            if audio:
+                yield audio
+    finally:
+        for future, started_here in futures:
+            if started_here:
+                future.cancel()  # the consumer stopped early; segments shared with another caller keep running
+
+
+def synthesize_speech(text: str) -> bytes:
+    """Synthesizes the whole text (sentence segments in parallel) as one clip; empty bytes if it failed."""
+    return join_audio(list(stream_speech(text)), tool_cfg.playai_response_format)
+
+
+async def astream_speech(text: str) -> AsyncIterator[bytes]:
+    """Async variant of stream_speech()."""
+    semaphore = asyncio.Semaphore(tool_cfg.tts_max_concurrency)
+
+    async def segment(chunk: str) -> bytes:
+        key = _segment_key(chunk)
+        audio = audio_cache.get(key)
+        if audio is None:
+            async with semaphore:
+                audio = await _atts_request(chunk)
+            audio_cache.put(key, audio)
+        return audio
+
+    chunks = split_sentences(text, tool_cfg.tts_chunk_min_chars, tool_cfg.tts_chunk_max_chars)
+    tasks = [asyncio.ensure_future(segment(chunk)) for chunk in chunks]
+    try:
+        for task in tasks:
+            audio = await task
+            if audio:
+                yield audio
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def asynthesize_speech(text: str) -> bytes:
+    """Async variant of synthesize_speech()."""
+    return join_audio([audio async for audio in astream_speech(text)], tool_cfg.playai_response_format)
+
 # Uncomment this block to use offline pyttsx3 TTS
 # def synthesize_speech(text: str):
 #     engine = pyttsx3.init()
@@ -71,4 +312,4 @@ def synthesize_speech(text: str) -> bytes:
 #         voice="alloy",
 #         input=text,
 #     )
-#     return response.content
\ No newline at end of file
+#     return response.content
@@ -0,0 +1,5 @@
+import os
+
+# The config loader requires API keys and a project name at import time; tests never call the real services
+for key in ("OPENAI_API_KEY", "GROQ_API_KEY", "TAVILY_API_KEY", "PINECONE_API_KEY", "LANGCHAIN_PROJECT"):
+    os.environ.setdefault(key, "test")
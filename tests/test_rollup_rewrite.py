@@ -0,0 +1,85 @@
+import os
+import json
+import random
+import sqlite3
+import pytest
+from src.sql_tuning.rollups import RollupRewriter, build_rollup, rollup_spec
+
+COLUMNS = ["id", "gender", "work_type", "age", "bmi"]
+
+QUERIES = [
+    "SELECT COUNT(*) FROM patients",
+    "SELECT COUNT(*) FROM patients WHERE gender = 'Female'",
+    "SELECT gender, COUNT(*), AVG(age), MIN(bmi), MAX(bmi) FROM patients GROUP BY gender",
+    "SELECT work_type, SUM(age) AS total_age FROM patients WHERE gender = 'Male' GROUP BY work_type ORDER BY total_age DESC",
+    "SELECT COUNT(bmi), AVG(bmi) FROM patients WHERE work_type IN ('Private', 'children')",
+    # filters matching no rows: COUNT must stay 0, not NULL
+    "SELECT COUNT(*) FROM patients WHERE gender = 'it''s'",
+    "SELECT COUNT(bmi), SUM(age), AVG(age), MIN(bmi) FROM patients WHERE gender = 'nobody'",
+    "SELECT gender, COUNT(*) FROM patients WHERE work_type = 'nobody' GROUP BY gender",
+]
+
+# Not re-aggregable from the rollup: must pass through unchanged
+NOT_REWRITTEN = [
+    "SELECT gender, COUNT(*), GROUP_CONCAT(work_type) FROM patients GROUP BY gender",
+    "SELECT gender, TOTAL(age) FROM patients GROUP BY gender",
+    "SELECT gender, COUNT(*) OVER (PARTITION BY work_type) FROM patients",
+    "SELECT gender, ROUND(AVG(age), 1) FROM patients GROUP BY gender",
+    "SELECT UPPER(gender), COUNT(*) FROM patients GROUP BY UPPER(gender)",
+    "SELECT COUNT(DISTINCT age) FROM patients",
+    "SELECT * FROM patients WHERE gender = 'Female'",
+]
+
+
+@pytest.fixture()
+def rewriter(tmp_path):
+    db_path = str(tmp_path / "health.db")
+    rng = random.Random(0)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE patients (id INTEGER, gender TEXT, work_type TEXT, age REAL, bmi REAL)")
+    conn.executemany(
+        "INSERT INTO patients VALUES (?, ?, ?, ?, ?)",
+        [
+            (i, rng.choice(["Female", "Male"]), rng.choice(["Private", "Govt_job", "children"]),
+             float(rng.randint(1, 90)), None if i % 7 == 0 else round(rng.uniform(15, 45), 1))
+            for i in range(500)
+        ],
+    )
+    spec = rollup_spec("patients", ["gender", "work_type"], ["age", "bmi"], COLUMNS)
+    spec["rows"] = build_rollup(conn, spec)
+    conn.commit()
+    conn.close()
+
+    manifest_path = str(tmp_path / "health.tuning.json")
+    with open(manifest_path, "w") as f:
+        json.dump({"indexes": [], "rollups": [spec], "db_mtime": os.path.getmtime(db_path)}, f)
+    return db_path, RollupRewriter(db_path, manifest_path)
+
+
+def _rows(conn, sql):
+    rows = [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in conn.execute(sql)]
+    return sorted(rows, key=repr)
+
+
+@pytest.mark.parametrize("sql", QUERIES)
+def test_rewrite_returns_the_same_rows(rewriter, sql):
+    db_path, rollups = rewriter
+    rewritten = rollups.rewrite(sql)
+    assert rewritten != sql, "expected the statement to be answered from the rollup"
+    conn = sqlite3.connect(db_path)
+    try:
+        assert _rows(conn, rewritten) == _rows(conn, sql)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("sql", NOT_REWRITTEN)
+def test_other_functions_are_not_rewritten(rewriter, sql):
+    _, rollups = rewriter
+    assert rollups.rewrite(sql) == sql
+
+
+def test_stale_rollup_is_not_used(rewriter):
+    db_path, rollups = rewriter
+    os.utime(db_path, (0, 0))  # the database changed after the rollups were built
+    assert rollups.rewrite(QUERIES[0]) == QUERIES[0]
@@ -0,0 +1,161 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.agent_graph.tavily_search_tool import SearchBackend, SearchResultCache, TavilyHTTPBackend
+
+
+class FakeTavilyServer:
+    """Local stand-in for the Tavily REST API: POST /search echoes the query as one result."""
+
+    def __init__(self) -> None:
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append((self.path, body))
+                payload = json.dumps({"results": [
+                    {"title": "Fake", "url": "http://fake.test/1", "content": f"about {body['query']}"}
+                ][:body["max_results"]]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubBackend(SearchBackend):
+    """Counts upstream calls; each call waits for `release` so tests control when it completes."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = []
+        self.fail = fail
+        self.release = None
+
+    async def search(self, query, max_results):
+        self.calls.append(query)
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [{"title": query, "url": "http://stub.test", "content": query}]
+
+
+@pytest.fixture()
+def tavily_server():
+    server = FakeTavilyServer()
+    yield server
+    server.close()
+
+
+def test_http_backend_against_fake_server(tavily_server):
+    cache = SearchResultCache(TavilyHTTPBackend(tavily_server.url, "test-key", 5.0), ttl_seconds=60, max_entries=8)
+
+    async def run():
+        first = await cache.search("Hand hygiene guidelines?", 3)
+        second = await cache.search("  hand   HYGIENE guidelines", 3)  # same normalized query
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == [{"title": "Fake", "url": "http://fake.test/1", "content": "about Hand hygiene guidelines?"}]
+    assert tavily_server.requests == [
+        ("/search", {"api_key": "test-key", "query": "Hand hygiene guidelines?", "max_results": 3})
+    ]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl():
+    backend = StubBackend()
+    cache = SearchResultCache(backend, ttl_seconds=0.05, max_entries=8)
+
+    async def run():
+        await cache.search("flu", 5)
+        await cache.search("flu", 5)
+        time.sleep(0.1)
+        await cache.search("flu", 5)
+
+    asyncio.run(run())
+    assert backend.calls == ["flu", "flu"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    backend = StubBackend()
+    cache = SearchResultCache(backend, ttl_seconds=60, max_entries=2)
+
+    async def run():
+        for query in ("a", "b", "a", "c", "a", "b"):
+            await cache.search(query, 5)
+
+    asyncio.run(run())
+    # "b" was the least recently used when "c" arrived, so only it is fetched again
+    assert backend.calls == ["a", "b", "c", "b"]
+    assert cache.stats()["entries"] == 2
+
+
+def test_concurrent_searches_share_one_upstream_call():
+    backend = StubBackend()
+
+    async def run():
+        cache = SearchResultCache(backend, ttl_seconds=60, max_entries=8)
+        backend.release = asyncio.Event()
+        waiters = [asyncio.ensure_future(cache.search("measles outbreak", 5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        backend.release.set()
+        return cache, await asyncio.gather(*waiters)
+
+    cache, results = asyncio.run(run())
+    assert backend.calls == ["measles outbreak"]
+    assert results[0] == results[1] == results[2]
+    assert (cache.misses, cache.coalesced) == (1, 2)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_search():
+    backend = StubBackend()
+
+    async def run():
+        cache = SearchResultCache(backend, ttl_seconds=60, max_entries=8)
+        backend.release = asyncio.Event()
+        first = asyncio.ensure_future(cache.search("cholera", 5))
+        second = asyncio.ensure_future(cache.search("cholera", 5))
+        await asyncio.sleep(0)
+        first.cancel()  # e.g. a discarded speculative run
+        await asyncio.sleep(0)
+        backend.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return cache, await second
+
+    cache, result = asyncio.run(run())
+    assert result == [{"title": "cholera", "url": "http://stub.test", "content": "cholera"}]
+    assert backend.calls == ["cholera"]
+    assert cache.stats()["entries"] == 1
+
+
+def test_failed_search_is_not_cached():
+    backend = StubBackend(fail=True)
+    cache = SearchResultCache(backend, ttl_seconds=60, max_entries=8)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await cache.search("typhoid", 5)
+
+    asyncio.run(run())
+    assert backend.calls == ["typhoid", "typhoid"]
+    assert cache.stats()["entries"] == 0